@@ -1,6 +1,8 @@
 import numpy as np
 import sys
 from scipy.optimize import *
+from CompressibleFlowFunctions.gas import *
+from CompressibleFlowFunctions.NSW import *
 
 
 def colebrook_white(f,Re,D,epsilon):
@@ -21,7 +23,9 @@ def fanno_equation(M,gamma):
     M       : Mach number
     gamma   : Ratio of specific heats
     '''
-    return ((1-M**2)/(gamma*M**2) + (gamma+1)/(2*gamma)*np.log(((gamma+1)*M**2)/(2*(1+(gamma-1)/2*M**2))))
+    g  = as_gas(gamma)
+    M2 = M*M
+    return (1-M2)/(g.gamma*M2) + g.gp1_2g*np.log(g.gp1*M2/(2+g.gm1*M2))
 
 def delta_fanno(M,L,f,D,gamma):
     '''
@@ -33,7 +37,7 @@ def delta_fanno(M,L,f,D,gamma):
     D       : Pipe diameter
     gamma   : Ratio of specific heats
     '''
-    return ((1-M**2)/(gamma*M**2) + (gamma+1)/(2*gamma)*np.log(((gamma+1)*M**2)/(2*(1+(gamma-1)/2*M**2))))-4*f*L/D
+    return fanno_equation(M,gamma)-4*f*L/D
 
 def Lstar_fanno(f,D,M,gamma): #Define the Fanno equation to iterate on
     '''
@@ -45,18 +49,30 @@ def Lstar_fanno(f,D,M,gamma): #Define the Fanno equation to iterate on
     gamma   : Ratio of specific heats
     '''
 
-    return ((1-M**2)/(gamma*M**2) + (gamma+1)/(2*gamma)*np.log(((gamma+1)*M**2)/(2*(1+(gamma-1)/2*M**2))))*D/(4*f)
+    return fanno_equation(M,gamma)*D/(4*f)
 
-def mach_fanno(L,f,D,gamma): #Define the Fanno equation to iterate on
+def mach_fanno(L,f,D,gamma,subsuper='subsonic'): #Define the Fanno equation to iterate on
     '''
-    Wraps the delta_fanno function to calculate a Mach number
+    Wraps the delta_fanno function to calculate a Mach number. This function allows the user to specify whether to resolve to the subsonic or supersonic branch
     Expected inputs:
     L       : Choking pipe length
     f       : Fanning friction factor
     D       : Pipe diameter
     gamma   : Ratio of specific heats
+    subsuper: Specify either 'subsonic' (default) or 'supersonic'. Supersonic flow only exists for 4fL/D < fanno_phi_max(gamma)
     '''
-    M = bisect(delta_fanno,0.001,0.99,args=(L,f,D,gamma))
+    g = as_gas(gamma)
+    ###Same residual as delta_fanno with the gamma terms and 4fL/D fixed before iterating
+    def delta(M,gamma,gp1_2g,gp1,gm1,phi):
+        M2 = M*M
+        return (1-M2)/(gamma*M2) + gp1_2g*np.log(gp1*M2/(2+gm1*M2)) - phi
+    args = (g.gamma,g.gp1_2g,g.gp1,g.gm1,4*f*L/D)
+    if subsuper == 'subsonic':
+        M = bisect(delta,0.001,0.9999,args=args)
+    elif subsuper == 'supersonic':
+        M = bisect(delta,1,100,args=args)
+    else:
+        sys.exit('Please specify whether you want to resolve to the "subsonic" or "supersonic" branch when calling mach_fanno')
     return M
 
 def fanno_po_ratio(M,gamma):
@@ -66,4 +82,102 @@ def fanno_po_ratio(M,gamma):
     gamma   : Ratio of specific heats
     '''
 
-    return (1/M)*((2+(gamma-1)*M**2)/(gamma+1))**((gamma+1)/(2*(gamma-1)))
+    g = as_gas(gamma)
+    return (1/M)*((2+g.gm1*M**2)/g.gp1)**g.gp1_2gm1
+
+def fanno_phi_max(gamma):
+    '''
+    Calculates the limit of the Fanno equation 4fL*/D as M tends to infinity. Supersonic flow chokes within a shorter length for any inlet Mach number.
+    gamma   : Ratio of specific heats
+    '''
+    g = as_gas(gamma)
+    return -1/g.gamma + g.gp1_2g*np.log(g.gp1/g.gm1)
+
+def mach_from_fanno(PHI,gamma,subsuper):
+    '''
+    Vectorized inverse of the Fanno equation: calculates the Mach number(s) whose choking parameter 4fL*/D equals PHI, by bisection on log(M) over all values at once.
+    Returns nan where no solution exists (PHI < 0, or PHI >= fanno_phi_max(gamma) on the supersonic branch).
+    Expected inputs:
+    PHI      : Value(s) of the Fanno equation, 4fL*/D
+    gamma    : Ratio of specific heats
+    subsuper : Specify either 'subsonic' or 'supersonic'
+
+    Returns: M
+    '''
+    g   = as_gas(gamma)
+    PHI = np.asarray(PHI, dtype=float)
+    if subsuper == 'subsonic':
+        lo, hi, sign = np.log(1e-4), 0.0, -1 #fanno_equation decreases with M below Mach 1
+    elif subsuper == 'supersonic':
+        lo, hi, sign = 0.0, np.log(1e4), 1  #and increases with M above it
+    else:
+        sys.exit('Please specify whether you want to resolve to the "subsonic" or "supersonic" branch when calling mach_from_fanno')
+    lo = np.full(np.broadcast(PHI, g.gamma).shape, lo)
+    hi = np.full(lo.shape, hi)
+    for _ in range(56):
+        mid = 0.5*(lo + hi)
+        above = sign*(fanno_equation(np.exp(mid),g) - PHI) > 0
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+    M = np.exp(0.5*(lo + hi))
+    valid = (PHI >= 0) & ((PHI < fanno_phi_max(g)) if subsuper == 'supersonic' else (PHI <= fanno_equation(1e-4,g)))
+    return np.where(valid, M, np.nan)[()]
+
+FANNO_DUCT_REGIMES = ('subsonic', 'supersonic', 'shock', 'choked', 'shock_upstream')
+
+def fanno_duct(M1,L,f,D,gamma):
+    '''
+    Solves adiabatic flow with friction through a duct of length L for arrays of inlet Mach numbers and lengths (arrays broadcast, so full operating maps are computed in one call).
+    Regimes, returned as indices of FANNO_DUCT_REGIMES:
+    0 'subsonic'       : subsonic inlet, duct shorter than L*
+    1 'supersonic'     : supersonic inlet, duct shorter than L*, no shock
+    2 'shock'          : supersonic inlet, duct longer than L*. A normal shock stands at x_shock and the exit is choked (M2 = 1),
+                         the back pressure being low enough. Upstream of the shock the flow follows the supersonic Fanno line from M1 to Mx,
+                         the shock takes it to My (mach_after_shock, pstag_after_shock) and the subsonic Fanno line from My chokes at the exit.
+    3 'choked'         : subsonic inlet, duct longer than L*. The inlet conditions cannot be sustained (outputs are nan)
+    4 'shock_upstream' : supersonic inlet, duct too long for a shock inside it. The shock moves upstream of the inlet (outputs are nan)
+    Expected inputs:
+    M1       : Inlet Mach number
+    L        : Duct length
+    f        : Fanning friction factor
+    D        : Duct diameter
+    gamma    : Ratio of specific heats
+
+    Returns: regime, x_shock, Mx, My, M2, Po2_Po1
+    x_shock, Mx and My are nan without a shock. Po2_Po1 is the exit to inlet stagnation pressure ratio.
+    '''
+    g    = as_gas(gamma)
+    M1   = np.asarray(M1, dtype=float)
+    C    = 4*f*np.asarray(L, dtype=float)/D
+    M1, C = np.broadcast_arrays(M1, C)
+    PHI1 = fanno_equation(M1,g)
+    supersonic = M1 > 1
+    too_long   = C > PHI1
+
+    #No shock: follow the Fanno line of the inlet
+    M2_sub = mach_from_fanno(np.where(supersonic | too_long, np.nan, PHI1 - C),g,'subsonic')
+    M2_sup = mach_from_fanno(np.where(supersonic & ~too_long, PHI1 - C, np.nan),g,'supersonic')
+
+    #Shock in the duct: find the pre-shock Mach number Mx in [1, M1] for which the subsonic Fanno line after the shock
+    #chokes exactly at the exit, PHI(My) = C - (PHI1 - PHI(Mx))
+    def residual(Mx):
+        return fanno_equation(mach_after_shock(Mx,g),g) + PHI1 - fanno_equation(Mx,g) - C
+    shock = supersonic & too_long & (residual(np.where(supersonic, M1, 2)) >= 0)
+    lo = np.ones(M1.shape)
+    hi = np.where(shock, M1, 2)
+    for _ in range(56):
+        mid   = 0.5*(lo + hi)
+        above = residual(mid) >= 0
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+    Mx = np.where(shock, 0.5*(lo + hi), np.nan)
+    My = mach_after_shock(Mx,g)
+    x_shock = (PHI1 - fanno_equation(Mx,g))*D/(4*f)
+
+    regime = np.select([~supersonic & ~too_long, supersonic & ~too_long, shock, ~supersonic], [0, 1, 2, 3], 4)
+    M2 = np.select([regime == 0, regime == 1, regime == 2], [M2_sub, M2_sup, 1.0], np.nan)
+    Po2_Po1_noshock = fanno_po_ratio(M2,g)/fanno_po_ratio(M1,g)
+    Pox_Po1 = fanno_po_ratio(Mx,g)/fanno_po_ratio(M1,g)
+    Po2_Po1_shock   = pstag_after_shock(Mx,g,Pox_Po1)/fanno_po_ratio(My,g)
+    Po2_Po1 = np.where(regime == 2, Po2_Po1_shock, Po2_Po1_noshock)
+    return regime[()], x_shock[()], Mx[()], My[()], M2[()], Po2_Po1[()]
@@ -1,6 +1,7 @@
 import numpy as np
 import sys
 from scipy.optimize import *
+from CompressibleFlowFunctions.gas import *
 
 def mdot_from_throat_area(A_throat, Po, Rs, To, gamma):
     '''
@@ -14,9 +15,10 @@ def mdot_from_throat_area(A_throat, Po, Rs, To, gamma):
 
     Returns: mdot
     '''
+    g = as_gas(gamma)
     term1 = A_throat * Po
-    term2 = np.sqrt(gamma / (Rs * To))
-    term3 = (2 / (gamma + 1)) ** ((gamma + 1) / (2 * (gamma - 1)))
+    term2 = g.sqrt_g_RT(To, Rs)
+    term3 = g.mass_factor
     mdot = term1 * term2 * term3
     return mdot
 
@@ -32,9 +34,12 @@ def throat_area_from_mdot(mdot, Po, Rs, To, gamma):
 
     Returns: A_throat
     '''
+    g = as_gas(gamma)
+    if Rs is None:
+        Rs = g.Rs
     term1 = mdot / Po
-    term2 = np.sqrt(Rs * To / gamma)
-    term3 = (2 / (gamma + 1)) ** (-(gamma + 1) / (2 * (gamma - 1)))
+    term2 = np.sqrt(Rs * To / g.gamma)
+    term3 = 1 / g.mass_factor
     A_throat = term1 * term2 * term3
     return A_throat
 
@@ -70,13 +75,14 @@ def mach_from_G(Po,Rs,To,gamma,mdot,Apipe,subsuper):
 
     Returns: M
     '''
-
-    def delta_G(M,Po,Rs,To,gamma,mdot,Apipe):
-        return mdot/Apipe - Po*np.sqrt(gamma/Rs/To)*M*(1+(gamma-2)/2*M*M)**(-(gamma+1)/(2*(gamma-1)))
+    g = as_gas(gamma)
+    def delta_G(M,G,k,a,e):
+        return G - k*M*(1+a*M*M)**e
+    args = (mdot/Apipe, Po*g.sqrt_g_RT(To, Rs), g.half_gm1, -g.gp1_2gm1)
     if subsuper == 'subsonic':
-        M = bisect(delta_G,0.00001,0.99,args=(Po,Rs,To,gamma,mdot,Apipe))
+        M = bisect(delta_G,0.00001,0.99,args=args)
     elif subsuper == 'supersonic':
-        M = bisect(delta_G,1,99,args=(Po,Rs,To,gamma,mdot,Apipe))
+        M = bisect(delta_G,1,99,args=args)
     else:
         sys.exit('Please specify whether you want to resolve to the "subsonic" or "supersonic" branch when calling mach_from_G')
 
@@ -93,12 +99,13 @@ def mach_from_aratio(Apipe,Astar,gamma,subsuper):
 
     Returns: M
     '''
-    def arat_delta(M,gamma,Apipe,Astar):
-        return Apipe/Astar - aratio_from_mach(M,gamma)
+    g = as_gas(gamma)
+    def arat_delta(M,g,Apipe,Astar):
+        return Apipe/Astar - aratio_from_mach(M,g)
     if subsuper == 'subsonic':
-        M = bisect(arat_delta,0.00001,0.99,args=(gamma,Apipe,Astar))
+        M = bisect(arat_delta,0.00001,0.99,args=(g,Apipe,Astar))
     elif subsuper == 'supersonic':
-        M = bisect(arat_delta,1,99,args=(gamma,Apipe,Astar))
+        M = bisect(arat_delta,1,99,args=(g,Apipe,Astar))
     else:
         sys.exit('Please specify whether you want to resolve to the "subsonic" or "supersonic" branch when calling mach_from_aratio')
     return M
@@ -113,9 +120,10 @@ def aratio_from_mach(M, gamma):
 
     Returns: Aratio
     """
-    term1 = 2 / (gamma + 1)
-    term2 = 1 + (gamma - 1) / 2 * M**2
-    exponent = (gamma + 1) / (2 * (gamma - 1))
+    g = as_gas(gamma)
+    term1 = g.two_gp1
+    term2 = 1 + g.half_gm1 * M**2
+    exponent = g.gp1_2gm1
     Aratio = (1 / M) * (term1 * term2) ** exponent
     return Aratio
 
@@ -129,7 +137,8 @@ def po_from_pratio(P,gamma,M):
 
     Returns: Po
     '''
-    Po = P/(1+((gamma-1)/2)*M**2)**(-(gamma)/(gamma-1))
+    g  = as_gas(gamma)
+    Po = P*(1+g.half_gm1*M**2)**g.g_gm1
     return Po
 
 def p_from_pratio(Po,gamma,M):
@@ -142,7 +151,8 @@ def p_from_pratio(Po,gamma,M):
 
     Returns: P_static
     '''
-    P_static = Po*(1+((gamma-1)/2)*M**2)**(-(gamma)/(gamma-1))
+    g = as_gas(gamma)
+    P_static = Po*(1+g.half_gm1*M**2)**(-g.g_gm1)
     return P_static
 
 def T_from_Tratio(To,gamma,M):
@@ -156,7 +166,8 @@ def T_from_Tratio(To,gamma,M):
     Returns: T_static
 
     '''
-    return To/(1+((gamma-1)/2)*M**2)
+    g = as_gas(gamma)
+    return To/(1+g.half_gm1*M**2)
 
 def To_from_Tratio(T,gamma,M):
     '''
@@ -169,7 +180,8 @@ def To_from_Tratio(T,gamma,M):
     Returns: To
 
     '''
-    return T*(1+((gamma-1)/2)*M**2)
+    g = as_gas(gamma)
+    return T*(1+g.half_gm1*M**2)
 
 ##############################################
 #              WRAPPED EQUATIONS             #
@@ -189,6 +201,27 @@ def delta_mass_static(M,mdot,P,Rs,To,gamma,A):
     A        : Cross-sectional area of the pipe in sq. m
     '''
 
-    return mdot - P*(1+(gamma-1)/2*M*M)**(gamma/(gamma-1))*A*np.sqrt(gamma/(Rs*To))*M*(1+(gamma-1)/2*M*M)**(-(gamma+1)/(2*(gamma-1)))
+    g = as_gas(gamma)
+    #The P/Po and mass flow exponents combine: gamma/(gamma-1) - (gamma+1)/(2(gamma-1)) = 1/2
+    return mdot - P*A*g.sqrt_g_RT(To, Rs)*M*np.sqrt(1+g.half_gm1*M*M)
+
 
+def mach_from_mass_static(mdot,P,Rs,To,gamma,A):
+    '''
+    Inverts delta_mass_static in closed form. The two Mach terms of the mass flow equation combine to mdot = P*A*sqrt(gamma/(Rs*To))*M*sqrt(1+(gamma-1)/2*M^2), a quadratic in M^2.
+    Returns nan where the flow cannot be subsonic. Every input may be an array.
+    Expected inputs:
+    mdot     : Mass flow rate, kg/s
+    P        : Static pressure, Pa
+    Rs       : Specific gas constant, J/kgK
+    To       : Stagnation temperature, K
+    gamma    : Ratio of specific heats
+    A        : Cross-sectional area of the pipe in sq. m
 
+    Returns: M
+    '''
+    g  = as_gas(gamma)
+    c2 = (mdot/(P*A*g.sqrt_g_RT(To, Rs)))**2
+    M2 = 2*c2/(1 + np.sqrt(1 + 2*g.gm1*c2)) #root of (gamma-1)/2*M2^2 + M2 - c2 = 0
+    M  = np.sqrt(M2)
+    return np.where(M < 1, M, np.nan)[()]
@@ -1,6 +1,7 @@
 import numpy as np
 import sys
 from scipy.optimize import *
+from CompressibleFlowFunctions.gas import *
 
 def prat_from_mach(gamma,M):
     '''
@@ -9,7 +10,9 @@ def prat_from_mach(gamma,M):
     M        : Mach number
     gamma    : Ratio of specific heats
     '''
-    pratio = (((gamma+1)*M*M)/((gamma-1)*M*M+2))**(gamma/(gamma-1))*((gamma+1)/(2*gamma*M*M-(gamma-1)))**(1/(gamma-1))
+    g  = as_gas(gamma)
+    M2 = M*M
+    pratio = (g.gp1*M2/(g.gm1*M2+2))**g.g_gm1*(g.gp1/(2*g.gamma*M2-g.gm1))**g.inv_gm1
     return pratio
 
 def mach_from_pressure_ratio(Po1,Po2,gamma):
@@ -21,9 +24,12 @@ def mach_from_pressure_ratio(Po1,Po2,gamma):
         gamma    : Ratio of specific heats
     '''
     Por  = Po2/Po1 ##Desired pressure ratio
-    def Prat(Mi,gamma,Por):
-        return (((gamma+1)*Mi*Mi)/((gamma-1)*Mi*Mi+2))**(gamma/(gamma-1))*((gamma+1)/(2*gamma*Mi*Mi-(gamma-1)))**(1/(gamma-1)) - Por
-    M = bisect(Prat,1,100,args=(gamma,Por))
+    g    = as_gas(gamma)
+    ###Same expression as prat_from_mach with the gamma terms fixed before iterating
+    def Prat(Mi,Por,gp1,gm1,two_g,g_gm1,inv_gm1):
+        M2 = Mi*Mi
+        return (gp1*M2/(gm1*M2+2))**g_gm1*(gp1/(two_g*M2-gm1))**inv_gm1 - Por
+    M = bisect(Prat,1,100,args=(Por,g.gp1,g.gm1,2*g.gamma,g.g_gm1,g.inv_gm1))
     return M
 
 def mach_after_shock(M1,gamma):
@@ -33,7 +39,8 @@ def mach_after_shock(M1,gamma):
     M1       : Mach number
     gamma    : Ratio of specific heats
     '''
-    M2 = np.sqrt(((gamma-1)*M1*M1+2)/(2*gamma*M1*M1-(gamma-1)))
+    g  = as_gas(gamma)
+    M2 = np.sqrt((g.gm1*M1*M1+2)/(2*g.gamma*M1*M1-g.gm1))
     return M2
 
 def pstatic_after_shock(M,gamma,P):
@@ -44,7 +51,8 @@ def pstatic_after_shock(M,gamma,P):
     gamma    : Ratio of specific heats
     P        : Static pressure before a normal shock wave
     '''
-    P2 = P*(2*gamma*M*M-(gamma-1))/(gamma+1)
+    g  = as_gas(gamma)
+    P2 = P*(2*g.gamma*M*M-g.gm1)/g.gp1
     return P2
 
 def pstag_after_shock(M,gamma,Po1):
@@ -55,5 +63,5 @@ def pstag_after_shock(M,gamma,Po1):
     gamma    : Ratio of specific heats
     Po1      : Stagnation pressure before a normal shock wave
     '''
-    Po2 = Po1*(((gamma+1)*M*M)/((gamma-1)*M*M+2))**(gamma/(gamma-1))*((gamma+1)/(2*gamma*M*M-(gamma-1)))**(1/(gamma-1)) ##Solution from the NSW stagnation pressure ratio equation.
+    Po2 = Po1*prat_from_mach(gamma,M) ##Solution from the NSW stagnation pressure ratio equation.
     return Po2
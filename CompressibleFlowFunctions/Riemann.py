@@ -0,0 +1,203 @@
+import numpy as np
+import sys
+from CompressibleFlowFunctions.NSW import *
+
+
+###Exact Riemann solver for the 1D Euler equations of an ideal gas (Toro, Riemann Solvers and Numerical Methods
+###for Fluid Dynamics, ch. 4). Every input may be an array and arrays broadcast against each other, so millions of
+###problems are solved at once. States are given as density (kg/m^3), velocity (m/s) and static pressure (Pa).
+###The shock branch is written with the normal shock relations of NSW.py: a wave of pressure ratio p*/pK is a
+###normal shock of Mach number Ms relative to the gas ahead of it.
+
+def shock_mach_from_pressure_ratio(pratio,gamma):
+    '''
+    Calculates the Mach number of a normal shock relative to the gas ahead of it, knowing the static pressure ratio across it. Inverse of pstatic_after_shock.
+    Expected inputs:
+    pratio   : Static pressure behind the shock over static pressure ahead of it
+    gamma    : Ratio of specific heats
+
+    Returns: Ms
+    '''
+    g = as_gas(gamma)
+    return np.sqrt(g.gp1_2g*pratio + g.gm1/(2*g.gamma))
+
+def riemann_pressure_function(p,rhoK,pK,aK,gamma):
+    '''
+    Calculates the velocity jump across the left or right wave of a Riemann problem for a trial star pressure p, and its derivative.
+    p > pK gives a shock, where the jump is 2*aK/(gamma+1)*(Ms - 1/Ms) for the shock Mach number Ms; p <= pK gives a rarefaction.
+    Expected inputs:
+    p        : Trial star region pressure, Pa
+    rhoK     : Density of the initial state, kg/m^3
+    pK       : Pressure of the initial state, Pa
+    aK       : Speed of sound of the initial state, m/s
+    gamma    : Ratio of specific heats
+
+    Returns: f, df
+    '''
+    g      = as_gas(gamma)
+    pratio = p/pK
+    shock  = pratio > 1
+    Ms     = shock_mach_from_pressure_ratio(np.where(shock, pratio, 1), g)
+    f_shock  = aK*g.two_gp1*(Ms - 1/Ms)
+    df_shock = aK*g.two_gp1*(1 + 1/(Ms*Ms))*g.gp1_2g/(2*Ms*pK)
+    z        = g.gm1/(2*g.gamma)
+    f_rare   = 2*aK*g.inv_gm1*(pratio**z - 1)
+    df_rare  = pratio**(-g.gp1_2g)/(rhoK*aK)
+    return np.where(shock, f_shock, f_rare), np.where(shock, df_shock, df_rare)
+
+def riemann_star(rhoL,uL,pL,rhoR,uR,pR,gamma,tol=1e-10,maxiter=50):
+    '''
+    Solves the star region between the left and right waves of Riemann problems by Newton iteration on all problems at once.
+    Problems whose initial states generate a vacuum return nan.
+    Expected inputs:
+    rhoL, uL, pL : Left state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    rhoR, uR, pR : Right state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    gamma        : Ratio of specific heats
+    tol          : Relative tolerance on the star pressure
+    maxiter      : Maximum number of Newton iterations
+
+    Returns: p_star, u_star, rhoL_star, rhoR_star, converged
+    '''
+    g  = as_gas(gamma)
+    aL = np.sqrt(g.gamma*pL/rhoL)
+    aR = np.sqrt(g.gamma*pR/rhoR)
+    du = uR - uL
+    vacuum = 2*g.inv_gm1*(aL + aR) <= du
+
+    #Two-rarefaction approximation as the initial guess, exact when both waves are rarefactions
+    z = g.gm1/(2*g.gamma)
+    with np.errstate(invalid='ignore'):
+        p = ((aL + aR - g.half_gm1*du)/(aL/pL**z + aR/pR**z))**(1/z)
+    p = np.where(vacuum, np.nan, p)
+    converged = vacuum.copy()
+    for _ in range(maxiter):
+        fL, dfL = riemann_pressure_function(p,rhoL,pL,aL,g)
+        fR, dfR = riemann_pressure_function(p,rhoR,pR,aR,g)
+        p_new = np.maximum(p - (fL + fR + du)/(dfL + dfR), tol*p)
+        with np.errstate(invalid='ignore'):
+            converged = converged | (2*np.abs(p_new - p) <= tol*(p_new + p))
+        p = np.where(vacuum, np.nan, p_new)
+        if np.all(converged):
+            break
+    fL = riemann_pressure_function(p,rhoL,pL,aL,g)[0]
+    fR = riemann_pressure_function(p,rhoR,pR,aR,g)[0]
+    u  = 0.5*(uL + uR) + 0.5*(fR - fL)
+    rhoL_star = _star_density(p,rhoL,pL,g)
+    rhoR_star = _star_density(p,rhoR,pR,g)
+    return p, u, rhoL_star, rhoR_star, converged & ~vacuum
+
+def riemann_waves(rhoL,uL,pL,rhoR,uR,pR,gamma,star=None):
+    '''
+    Classifies the left and right waves of Riemann problems and calculates their speeds.
+    For a shock the head and tail speeds are both the shock speed, and the shock Mach numbers relative to the gas ahead of
+    and behind the shock (mach_after_shock) are given; they are nan for rarefactions.
+    Expected inputs:
+    rhoL, uL, pL : Left state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    rhoR, uR, pR : Right state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    gamma        : Ratio of specific heats
+    star         : Output of riemann_star, computed if not given
+
+    Returns: left_shock, right_shock, SL_head, SL_tail, SR_head, SR_tail, ML_shock, MR_shock, ML_behind, MR_behind
+    '''
+    g = as_gas(gamma)
+    p, u, rhoL_star, rhoR_star = (star or riemann_star(rhoL,uL,pL,rhoR,uR,pR,g))[:4]
+    aL = np.sqrt(g.gamma*pL/rhoL)
+    aR = np.sqrt(g.gamma*pR/rhoR)
+    left_shock  = p > pL
+    right_shock = p > pR
+    ML = shock_mach_from_pressure_ratio(np.where(left_shock, p/pL, 1), g)
+    MR = shock_mach_from_pressure_ratio(np.where(right_shock, p/pR, 1), g)
+    SL_head = np.where(left_shock, uL - aL*ML, uL - aL)
+    SL_tail = np.where(left_shock, SL_head, u - np.sqrt(g.gamma*p/rhoL_star))
+    SR_head = np.where(right_shock, uR + aR*MR, uR + aR)
+    SR_tail = np.where(right_shock, SR_head, u + np.sqrt(g.gamma*p/rhoR_star))
+    ML_shock  = np.where(left_shock, ML, np.nan)
+    MR_shock  = np.where(right_shock, MR, np.nan)
+    ML_behind = np.where(left_shock, mach_after_shock(ML,g), np.nan)
+    MR_behind = np.where(right_shock, mach_after_shock(MR,g), np.nan)
+    return left_shock, right_shock, SL_head, SL_tail, SR_head, SR_tail, ML_shock, MR_shock, ML_behind, MR_behind
+
+def riemann_sample(S,rhoL,uL,pL,rhoR,uR,pR,gamma,star=None):
+    '''
+    Samples the self-similar solution of Riemann problems at S = x/t. S broadcasts against the states, e.g. states of shape (n,1)
+    and S of shape (1,m) sample n problems on m points.
+    Expected inputs:
+    S            : Similarity variable x/t, m/s
+    rhoL, uL, pL : Left state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    rhoR, uR, pR : Right state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    gamma        : Ratio of specific heats
+    star         : Output of riemann_star, computed if not given
+
+    Returns: rho, u, p
+    '''
+    g = as_gas(gamma)
+    star = star or riemann_star(rhoL,uL,pL,rhoR,uR,pR,g)
+    p_star, u_star, rhoL_star, rhoR_star = star[:4]
+    left_shock, right_shock, SL_head, SL_tail, SR_head, SR_tail = riemann_waves(rhoL,uL,pL,rhoR,uR,pR,g,star)[:6]
+    aL = np.sqrt(g.gamma*pL/rhoL)
+    aR = np.sqrt(g.gamma*pR/rhoR)
+
+    #States inside the rarefaction fans
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a_fanL   = g.two_gp1*(aL + g.half_gm1*(uL - S))
+        u_fanL   = g.two_gp1*(aL + g.half_gm1*uL + S)
+        rho_fanL = rhoL*(a_fanL/aL)**(2*g.inv_gm1)
+        p_fanL   = pL*(a_fanL/aL)**(2*g.g_gm1)
+        a_fanR   = g.two_gp1*(aR - g.half_gm1*(uR - S))
+        u_fanR   = g.two_gp1*(-aR + g.half_gm1*uR + S)
+        rho_fanR = rhoR*(a_fanR/aR)**(2*g.inv_gm1)
+        p_fanR   = pR*(a_fanR/aR)**(2*g.g_gm1)
+
+    regions = [S < SL_head,
+               S < SL_tail,
+               S <= u_star,
+               S <= SR_tail,
+               S <= SR_head]
+    def select(left, fanL, starL, starR, fanR, right):
+        return np.select(regions, [left, fanL, starL, starR, fanR], right)
+    rho = select(rhoL, rho_fanL, rhoL_star, rhoR_star, rho_fanR, rhoR)
+    u   = select(uL, u_fanL, u_star, u_star, u_fanR, uR)
+    p   = select(pL, p_fanL, p_star, p_star, p_fanR, pR)
+    return rho, u, p
+
+def riemann_solution(x,t,rhoL,uL,pL,rhoR,uR,pR,gamma,x0=0):
+    '''
+    Calculates the solution of shock tube problems on a grid, the diaphragm at x0 bursting at t = 0.
+    Expected inputs:
+    x            : Positions, m
+    t            : Time, s (> 0)
+    rhoL, uL, pL : Left state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    rhoR, uR, pR : Right state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    gamma        : Ratio of specific heats
+    x0           : Diaphragm position, m
+
+    Returns: rho, u, p
+    '''
+    return riemann_sample((np.asarray(x) - x0)/t,rhoL,uL,pL,rhoR,uR,pR,gamma)
+
+def riemann_flux(rhoL,uL,pL,rhoR,uR,pR,gamma):
+    '''
+    Calculates the exact (Godunov) flux of the Euler equations across the interface of Riemann problems, for use in finite volume schemes.
+    Expected inputs:
+    rhoL, uL, pL : Left state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    rhoR, uR, pR : Right state density (kg/m^3), velocity (m/s) and pressure (Pa)
+    gamma        : Ratio of specific heats
+
+    Returns: F_mass, F_momentum, F_energy
+    '''
+    g = as_gas(gamma)
+    rho, u, p = riemann_sample(0,rhoL,uL,pL,rhoR,uR,pR,g)
+    E = p*g.inv_gm1 + 0.5*rho*u*u
+    return rho*u, rho*u*u + p, u*(E + p)
+
+##############################################
+#                  HELPERS                   #
+##############################################
+
+def _star_density(p,rhoK,pK,g):
+    pratio = p/pK
+    shock  = pratio > 1
+    Ms     = shock_mach_from_pressure_ratio(np.where(shock, pratio, 1), g)
+    rho_shock = rhoK*g.gp1*Ms*Ms/(g.gm1*Ms*Ms + 2) #normal shock density ratio
+    rho_rare  = rhoK*pratio**(1/g.gamma)
+    return np.where(shock, rho_shock, rho_rare)
@@ -5,12 +5,14 @@ from CompressibleFlowFunctions.Isentropic import *
 from CompressibleFlowFunctions.Fanno import *
 from CompressibleFlowFunctions.NSW import *
 from CompressibleFlowFunctions.misc import *
+from CompressibleFlowFunctions.valve import *
+from CompressibleFlowFunctions.cache import cached, cache_enabled
 
 
 ###All functions take as an input: pressure in PSI, Temperature in Kelvin, Pipe diameters in inches
 ###All functions output answers in SI units
 
-def fanno_losses_backwards(Po2,To,gamma,M2,Rs,Dpipe,mu,epsilon,L,fluid): #function to be added to CompressibleFlowFunctions.py
+def fanno_losses_backwards(Po2,To,gamma,M2,Rs,Dpipe,mu,epsilon,L,fluid,subsuper='subsonic'): #function to be added to CompressibleFlowFunctions.py
     '''
     Function calculates initial conditions in a friction pipe knowing the exit conditions
     Expected inputs:
@@ -23,14 +25,17 @@ def fanno_losses_backwards(Po2,To,gamma,M2,Rs,Dpipe,mu,epsilon,L,fluid): #functi
     mu       : Dynamic viscosity
     epsilon  : Surface roughness
     L        : Pipe length, meters
+    subsuper : Branch of the flow in the pipe, 'subsonic' (default) or 'supersonic'. M2 must be on the same branch
     '''
+    if subsuper not in ('subsonic', 'supersonic'):
+        sys.exit('Please specify whether you want to resolve to the "subsonic" or "supersonic" branch when calling fanno_losses_backwards')
     PHI2           = fanno_equation(M2,gamma)
     f, Re          = fanning_and_reynolds(Po2,To,gamma,M2,Rs,Dpipe,mu,epsilon,fluid)
     Lstar2         = Lstar_fanno(f,Dpipe,M2,gamma)
     fanno_constant = 4*f*L/Dpipe
     PHI1           = fanno_constant + PHI2
     Lstar1         = Lstar2 + L
-    M1             = bisect(delta_fanno,0.001,0.9999,args=(Lstar1,f,Dpipe,gamma))
+    M1             = mach_fanno(Lstar1,f,Dpipe,gamma,subsuper)
     Poratf  = fanno_po_ratio(M2,gamma)
     Postar  = Po2/Poratf
     Po1     = Postar*fanno_po_ratio(M1,gamma)
@@ -41,12 +46,23 @@ def fanno_losses_backwards(Po2,To,gamma,M2,Rs,Dpipe,mu,epsilon,L,fluid): #functi
 
 
 def valve_losses_backwards(P1,Cv,SG,Q,mdot,Rs,To,gamma,Apipe): ##Based on the deltrol equation
-    P_bval  = newton(flowrates_backwards,P1, args=(P1,Cv,SG,Q))
-    if P_bval > 2*P1:
-        P_bval = flowrates_choked(Cv,SG,Q)
-    M_bval  = bisect(delta_mass_static,0.0000001,0.99999999,args=(mdot,P_bval*101325/14.7,Rs,To,gamma,Apipe))
-    #Po_bval = P_bval/(1+((gamma-1)/2)*M_bval**2)**(-(gamma)/(gamma-1))
-    Po_bval = po_from_pratio(P_bval,gamma,M_bval)
+    '''
+    Function calculates the conditions upstream of a valve knowing the downstream pressure. Closed-form solution, see valve.valve_backward
+    Where the valve is choked (upstream pressure above twice P1) the upstream pressure is given by flowrates_choked(); use valve_backward to get the choked flag
+    Expected inputs:
+    P1       : Pressure downstream of the valve, PSI
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    Q        : Volumetric flow rate, SCFH (see mdot_to_scfh)
+    mdot     : Mass flow rate, kg/s
+    Rs       : Specific gas constant, J/kgK
+    To       : Stagnation temperature, K
+    gamma    : Ratio of specific heats
+    Apipe    : Cross-sectional area of the upstream pipe, sq. m
+
+    Returns: P_bval, Po_bval, M_bval
+    '''
+    P_bval, Po_bval, M_bval, choked = valve_backward(P1,Cv,SG,Q,mdot,Rs,To,gamma,Apipe)
     return P_bval, Po_bval, M_bval
 
 # def valve_losses_backwards(P2,Cv,SG,Q,mdot,Rs,To,gamma,Apipe): ##Based on the Swagelok equation
@@ -109,8 +125,27 @@ def fanno_losses(mdot,Rs,SG,Dpipe,Apipe,Po1,Po1_metric,To,gamma,mu,epsilon,L):
     return P1, Po1, M1, Lstar1, P2, Po2, M2, Re
 
 def valve_losses(P1,Cv,SG,Q,mdot,Rs,To,gamma,Apipe):
-    #P2 = bisect(flowrates, 0, P1,args=(P1,Cv,SG,Q))
-    P2 = bisect(flowrates,0,P1,args=(P1,Cv,SG,Q))
-    M_aval  = bisect(delta_mass_static,0.0001,0.99,args=(mdot,P2*101325/14.7,Rs,To,gamma,Apipe))
-    Po_aval = P2/(1+((gamma-1)/2)*M_aval**2)**(-(gamma)/(gamma-1))
+    '''
+    Function calculates the conditions downstream of a valve knowing the upstream pressure. Closed-form solution, see valve.valve_forward
+    Where the valve is choked (P2 below P1/2) the outputs are still those of the flowrates() solution; use valve_forward to get the choked flag
+    Expected inputs:
+    P1       : Pressure upstream of the valve, PSI
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    Q        : Volumetric flow rate, SCFH (see mdot_to_scfh)
+    mdot     : Mass flow rate, kg/s
+    Rs       : Specific gas constant, J/kgK
+    To       : Stagnation temperature, K
+    gamma    : Ratio of specific heats
+    Apipe    : Cross-sectional area of the downstream pipe, sq. m
+
+    Returns: P2, M_aval, Po_aval
+    '''
+    P2, M_aval, Po_aval, choked = valve_forward(P1,Cv,SG,Q,mdot,Rs,To,gamma,Apipe)
     return P2,M_aval,Po_aval
+
+##Opt-in persistent result cache, turned on by setting the CFF_CACHE environment variable (see cache.py)
+if cache_enabled():
+    fanno_losses           = cached(fanno_losses)
+    fanno_losses_backwards = cached(fanno_losses_backwards)
+    valve_losses_backwards = cached(valve_losses_backwards)
@@ -0,0 +1,362 @@
+import numpy as np
+import sys
+import csv
+import inspect
+import argparse
+import importlib
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+###Streams case files through any public library function in fixed-size chunks.
+###Only one chunk per worker (plus one being written) is held in memory at a time.
+
+def resolve_function(spec):
+    '''
+    Resolves a function specification to a public library function.
+    Expected inputs:
+    spec     : String of the form 'module.function', e.g. 'algos.fanno_losses' or 'NSW.pstag_after_shock'
+
+    Returns: func
+    '''
+    modname, _, funcname = spec.rpartition('.')
+    if not modname or not funcname or funcname.startswith('_'):
+        raise ValueError('Function must be given as "module.function", e.g. "Isentropic.mach_from_G", got "%s"' % spec)
+    if not modname.startswith('CompressibleFlowFunctions'):
+        modname = 'CompressibleFlowFunctions.' + modname
+    module = importlib.import_module(modname)
+    func = getattr(module, funcname, None)
+    if not inspect.isfunction(func):
+        raise ValueError('"%s" is not a function of %s' % (funcname, modname))
+    return func
+
+def output_names(func, count=None):
+    '''
+    Names the outputs of a function from the "Returns:" line of its docstring, falling back to numbered names.
+    Expected inputs:
+    func     : Library function
+    count    : Number of outputs actually returned, if known
+
+    Returns: names
+    '''
+    names = []
+    for line in (func.__doc__ or '').splitlines():
+        line = line.strip()
+        if line.startswith('Returns:'):
+            names = [name.strip() for name in line[len('Returns:'):].split(',') if name.strip()]
+            break
+    if names and (count is None or len(names) == count):
+        return names
+    if count is None or count == 1:
+        return [func.__name__]
+    return ['%s_%d' % (func.__name__, i) for i in range(count)]
+
+def read_csv_chunks(path, chunksize):
+    '''
+    Streams a CSV case file as dictionaries of column arrays, chunksize rows at a time.
+    A column is numeric if any of its first max(chunksize, 1000) cells holds a number; blank or non-numeric cells of numeric
+    columns are then read as nan, so only the rows holding them fail.
+    Expected inputs:
+    path      : Path to a CSV file with a header row
+    chunksize : Number of rows per chunk
+    '''
+    kinds = {}
+    with open(path, newline='') as fh:
+        reader = (row for row in csv.reader(fh) if row)
+        header = next(reader)
+        head = list(itertools.islice(reader, max(chunksize, 1000)))
+        _columns_from_rows(header, head, kinds)
+        rows = []
+        for row in itertools.chain(head, reader):
+            rows.append(row)
+            if len(rows) == chunksize:
+                yield _columns_from_rows(header, rows, kinds)
+                rows = []
+        if rows:
+            yield _columns_from_rows(header, rows, kinds)
+
+def read_parquet_chunks(path, chunksize):
+    '''
+    Streams a Parquet case file as dictionaries of column arrays, chunksize rows at a time. Requires pyarrow.
+    Columns are typed as in read_csv_chunks; nulls in numeric columns are read as nan.
+    Expected inputs:
+    path      : Path to a Parquet file
+    chunksize : Number of rows per chunk
+    '''
+    import pyarrow.parquet as pq
+    pfile = pq.ParquetFile(path)
+    kinds = {}
+    for batch in pfile.iter_batches(batch_size=chunksize):
+        yield {name: _as_column(name, batch.column(i).to_numpy(zero_copy_only=False), kinds)
+               for i, name in enumerate(batch.schema.names)}
+
+def evaluate_chunk(spec, columns, argmap=None, constants=None):
+    '''
+    Evaluates a library function on every row of a chunk. The whole chunk is first passed as arrays; functions
+    that cannot take arrays (e.g. those wrapping scipy root finders) are then evaluated row by row.
+    Expected inputs:
+    spec      : Function specification, see resolve_function
+    columns   : Dictionary of column name to array, all of the same length
+    argmap    : Dictionary of function argument to column name. Arguments not listed are read from the column of the same name
+    constants : Dictionary of function argument to a value shared by all rows
+
+    Returns: outputs, status, error
+    '''
+    func = resolve_function(spec)
+    nrows = len(next(iter(columns.values())))
+    kwargs = _bind_arguments(func, columns, argmap or {}, constants or {})
+
+    outputs = None
+    try:
+        with np.errstate(all='ignore'):
+            outputs = _split_outputs(func(**kwargs), nrows)
+    except (Exception, SystemExit):
+        outputs = None
+
+    if outputs is not None:
+        error = np.full(nrows, '', dtype=object)
+        status = np.where(np.all([np.isfinite(out) for out in outputs], axis=0), 'ok', 'nonfinite').astype(object)
+        return outputs, status, error
+
+    results = [None]*nrows
+    status = np.full(nrows, 'ok', dtype=object)
+    error = np.full(nrows, '', dtype=object)
+    for i in range(nrows):
+        row = {arg: (val[i] if isinstance(val, np.ndarray) else val) for arg, val in kwargs.items()}
+        try:
+            with np.errstate(all='ignore'):
+                results[i] = _as_tuple(func(**row))
+        except (Exception, SystemExit) as e:
+            status[i] = 'error'
+            error[i] = '%s: %s' % (type(e).__name__, e)
+    noutputs = max([len(res) for res in results if res is not None], default=0)
+    outputs = [np.full(nrows, np.nan) for _ in range(noutputs)]
+    for i, res in enumerate(results):
+        if res is None:
+            continue
+        if len(res) != noutputs:
+            status[i] = 'error'
+            error[i] = 'Function returned %d outputs, expected %d' % (len(res), noutputs)
+            continue
+        for j, val in enumerate(res):
+            try:
+                outputs[j][i] = float(val)
+            except (TypeError, ValueError):
+                status[i] = 'error'
+                error[i] = 'Non-numeric output %r' % (val,)
+        if status[i] == 'ok' and not all(np.isfinite(out[i]) for out in outputs):
+            status[i] = 'nonfinite'
+    return outputs, status, error
+
+def run_batch(spec, infile, outfile, argmap=None, constants=None, outputs=None, chunksize=10000, workers=1, passthrough=True):
+    '''
+    Streams a CSV or Parquet case file through a library function and writes the results incrementally.
+    Each output row holds the input columns (if passthrough), the function outputs, a 'status' column
+    ('ok', 'nonfinite' or 'error') and an 'error' column with the failure message. Rows are never dropped: a row that fails,
+    or a chunk returning a different number of outputs than the others, is written with nan outputs and an error.
+    Expected inputs:
+    spec        : Function specification, e.g. 'algos.fanno_losses'
+    infile      : Input case file, .csv or .parquet
+    outfile     : Output file, .csv or .parquet
+    argmap      : Dictionary of function argument to input column name
+    constants   : Dictionary of function argument to a value shared by all rows
+    outputs     : List of output column names. Defaults to the "Returns:" line of the function docstring
+    chunksize   : Number of rows evaluated per chunk
+    workers     : Number of worker processes. 1 evaluates in the calling process
+    passthrough : Copy the input columns to the output file
+
+    Returns: nrows, nfailed
+    '''
+    func = resolve_function(spec)
+    if chunksize < 1 or workers < 1:
+        raise ValueError('chunksize and workers must both be at least 1')
+    chunks = _reader(infile)(infile, chunksize)
+    sink = _writer(outfile)
+    names = list(outputs) if outputs else None
+    nrows = nfailed = 0
+    held = [] #chunks that failed entirely before the number of outputs is known, at most 2*workers
+
+    def write(columns, result):
+        nonlocal names, nrows, nfailed
+        outs, status, error = result
+        if names is None:
+            if not outs and len(held) < 2*workers:
+                held.append((columns, result))
+                return
+            #Past 2*workers failed chunks the names are fixed from the docstring so that memory stays bounded
+            names = output_names(func, len(outs) if outs else None)
+        while held:
+            write(*held.pop(0))
+        if outs and len(outs) != len(names):
+            status = np.full(len(status), 'error', dtype=object)
+            error = np.full(len(status), '%s returned %d outputs but %d output names were given' % (spec, len(outs), len(names)), dtype=object)
+            outs = None
+        if not outs:
+            outs = [np.full(len(status), np.nan) for _ in names]
+        table = dict(columns) if passthrough else {}
+        table.update(zip([('out_' + name if name in table else name) for name in names], outs))
+        table['status'] = status
+        table['error'] = error
+        sink.write(table)
+        nrows += len(status)
+        nfailed += int(np.sum(status != 'ok'))
+
+    try:
+        if workers == 1:
+            for columns in chunks:
+                write(columns, evaluate_chunk(spec, columns, argmap, constants))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for columns in chunks:
+                    pending.append((columns, pool.submit(evaluate_chunk, spec, columns, argmap, constants)))
+                    if len(pending) >= 2*workers:
+                        columns, future = pending.popleft()
+                        write(columns, future.result())
+                while pending:
+                    columns, future = pending.popleft()
+                    write(columns, future.result())
+        if held:
+            names = output_names(func)
+            while held:
+                write(*held.pop(0))
+    finally:
+        sink.close()
+    return nrows, nfailed
+
+def main(argv=None):
+    '''
+    Entry point of the cff-batch command. Run "cff-batch --help" for usage.
+    '''
+    parser = argparse.ArgumentParser(prog='cff-batch', description='Evaluate a CompressibleFlowFunctions function on every row of a CSV or Parquet case file.')
+    parser.add_argument('function', help="Function to evaluate, e.g. 'algos.fanno_losses' or 'Isentropic.mach_from_G'")
+    parser.add_argument('infile', help='Input case file (.csv or .parquet)')
+    parser.add_argument('outfile', help='Output file (.csv or .parquet)')
+    parser.add_argument('--map', action='append', default=[], metavar='ARG=COLUMN', help='Read function argument ARG from input column COLUMN')
+    parser.add_argument('--const', action='append', default=[], metavar='ARG=VALUE', help='Use VALUE for function argument ARG on every row')
+    parser.add_argument('--outputs', default=None, help='Comma separated output column names')
+    parser.add_argument('--chunksize', type=int, default=10000, help='Rows per chunk (default 10000)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes (default 1)')
+    parser.add_argument('--no-passthrough', action='store_true', help='Do not copy input columns to the output file')
+    args = parser.parse_args(argv)
+
+    try:
+        argmap = dict(_split_pair(item) for item in args.map)
+        constants = {key: _parse_value(val) for key, val in (_split_pair(item) for item in args.const)}
+        outputs = [name.strip() for name in args.outputs.split(',')] if args.outputs else None
+        nrows, nfailed = run_batch(args.function, args.infile, args.outfile, argmap, constants, outputs,
+                                   args.chunksize, args.workers, not args.no_passthrough)
+    except (ValueError, ImportError, OSError) as e:
+        sys.exit('cff-batch: %s' % e)
+    print('%d rows evaluated, %d not ok' % (nrows, nfailed))
+    return 0
+
+##############################################
+#                  HELPERS                   #
+##############################################
+
+def _as_column(name, values, kinds):
+    # The kind of a column is fixed by its first chunk so that every chunk has the same dtypes
+    values = np.asarray(values, dtype=object) if not isinstance(values, np.ndarray) else values
+    if name not in kinds:
+        text = [val for val in values if val is not None and str(val).strip() != '']
+        kinds[name] = values.dtype.kind in 'biuf' or not text or any(_to_float(val) == _to_float(val) for val in text)
+    if not kinds[name]:
+        return values.astype(object)
+    if values.dtype.kind in 'biuf':
+        return values.astype(float)
+    return np.array([_to_float(val) for val in values], dtype=float)
+
+def _to_float(val):
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _columns_from_rows(header, rows, kinds):
+    return {name: _as_column(name, [row[i] if i < len(row) else '' for row in rows], kinds) for i, name in enumerate(header)}
+
+def _bind_arguments(func, columns, argmap, constants):
+    kwargs = {}
+    for name, param in inspect.signature(func).parameters.items():
+        if name in constants:
+            kwargs[name] = constants[name]
+        elif argmap.get(name, name) in columns:
+            kwargs[name] = columns[argmap.get(name, name)]
+        elif param.default is inspect.Parameter.empty:
+            raise ValueError('No column or constant given for argument "%s" of %s' % (name, func.__name__))
+    return kwargs
+
+def _as_tuple(result):
+    if isinstance(result, tuple):
+        return result
+    if isinstance(result, list):
+        return tuple(result)
+    return (result,)
+
+def _split_outputs(result, nrows):
+    outputs = [np.asarray(out, dtype=float) for out in _as_tuple(result)]
+    if not outputs or any(out.shape != (nrows,) for out in outputs):
+        return None
+    return outputs
+
+def _split_pair(item):
+    key, sep, val = item.partition('=')
+    if not sep or not key:
+        raise ValueError('Expected ARG=VALUE, got "%s"' % item)
+    return key.strip(), val.strip()
+
+def _parse_value(val):
+    try:
+        return float(val)
+    except ValueError:
+        return val
+
+def _reader(path):
+    if str(path).endswith('.parquet'):
+        return read_parquet_chunks
+    return read_csv_chunks
+
+def _writer(path):
+    if str(path).endswith('.parquet'):
+        return _ParquetSink(path)
+    return _CSVSink(path)
+
+class _CSVSink:
+    def __init__(self, path):
+        self.fh = open(path, 'w', newline='')
+        self.writer = csv.writer(self.fh)
+        self.header = None
+
+    def write(self, table):
+        if self.header is None:
+            self.header = list(table)
+            self.writer.writerow(self.header)
+        self.writer.writerows(zip(*[table[name] for name in self.header]))
+        self.fh.flush()
+
+    def close(self):
+        self.fh.close()
+
+class _ParquetSink:
+    def __init__(self, path):
+        import pyarrow
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pyarrow, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, table):
+        table = self.pa.table({name: (col.tolist() if col.dtype == object else col) for name, col in table.items()})
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import numpy as np
+import os
+import io
+import time
+import sqlite3
+import atexit
+import hashlib
+import inspect
+import threading
+import functools
+import weakref
+from CompressibleFlowFunctions import __version__
+from CompressibleFlowFunctions.gas import Gas, Sutherland
+
+
+###Opt-in persistent cache for expensive calls (e.g. algos.fanno_losses).
+###Results are keyed by a hash of the function identity, library version and inputs rounded to a number of
+###significant digits, and stored in a single SQLite file shared by every process that points at it.
+###Results are stored as numpy arrays (np.savez, read back with allow_pickle=False), never as pickles, so a
+###shared cache file cannot run code in the processes reading it.
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'CompressibleFlowFunctions', 'results.sqlite')
+
+class ResultCache:
+    '''
+    On-disk result cache with a size limit and least recently used eviction. Safe to share between processes.
+    Expected inputs:
+    path      : SQLite file, created if needed. Defaults to $CFF_CACHE_PATH or ~/.cache/CompressibleFlowFunctions/results.sqlite
+    max_bytes : Maximum size of the stored results before the least recently used ones are evicted
+    digits    : Number of significant digits inputs are rounded to before hashing
+    '''
+    def __init__(self, path=None, max_bytes=256*2**20, digits=12):
+        self.path = path or os.environ.get('CFF_CACHE_PATH') or DEFAULT_PATH
+        self.max_bytes = max_bytes
+        self.digits = digits
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._touched = {} #last access times and counters not yet written, see _flush_access
+        self._pending = {'hits': 0, 'misses': 0}
+        self._flushed = time.time()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def key(self, func, args=(), kwargs=None):
+        '''
+        Hashes the function identity, library version and rounded inputs of a call.
+        Raises TypeError if an input cannot be hashed reproducibly.
+        '''
+        bound = inspect.signature(func).bind(*args, **(kwargs or {}))
+        bound.apply_defaults()
+        ident = (func.__module__, func.__qualname__, __version__,
+                 tuple((name, _normalize(val, self.digits)) for name, val in bound.arguments.items()))
+        return hashlib.sha256(repr(ident).encode()).hexdigest()
+
+    def get(self, key):
+        '''
+        Looks a key up. Lookups only read the file, so they never wait for the write lock; the last access time and the
+        shared counters are written in batches, with the next put or at most every 256 lookups or 10 s.
+
+        Returns: hit, value
+        '''
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                try:
+                    value = _loads(row[0])
+                except (ValueError, KeyError, OSError): #not written by _dumps, e.g. an older pickled result; recomputed and overwritten
+                    row = None
+            if row is None:
+                self.misses += 1
+                self._pending['misses'] += 1
+            else:
+                self.hits += 1
+                self._pending['hits'] += 1
+                self._touched[key] = time.time()
+            flush = sum(self._pending.values()) >= 256 or time.time() - self._flushed > 10
+        if flush:
+            self.flush()
+        if row is None:
+            return False, None
+        return True, value
+
+    def put(self, key, value):
+        '''
+        Stores a result, then evicts the least recently used results if the cache exceeds max_bytes.
+        Raises TypeError if the result is not a number, a numeric array or a tuple or list of them.
+        '''
+        blob = _dumps(value)
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._flush_access(conn)
+                conn.execute('INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                             (key, blob, len(blob), time.time()))
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+                if total > self.max_bytes:
+                    evict = []
+                    for old_key, size in conn.execute('SELECT key, size FROM results ORDER BY last_access'):
+                        if total <= 0.9*self.max_bytes:
+                            break
+                        evict.append((old_key,))
+                        total -= size
+                    conn.executemany('DELETE FROM results WHERE key = ?', evict)
+                    conn.execute("UPDATE counters SET count = count + ? WHERE name = 'evictions'", (len(evict),))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def stats(self):
+        '''
+        Reports the hit rate of this process and of every process sharing the cache file.
+
+        Returns: dictionary with hits, misses, hit_rate, total_hits, total_misses, total_hit_rate, evictions, entries, bytes
+        '''
+        self.flush()
+        with self._lock:
+            conn = self._connect()
+            counters = dict(conn.execute('SELECT name, count FROM counters').fetchall())
+            entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        calls = self.hits + self.misses
+        total_calls = counters['hits'] + counters['misses']
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits/calls if calls else 0.0,
+                'total_hits': counters['hits'], 'total_misses': counters['misses'],
+                'total_hit_rate': counters['hits']/total_calls if total_calls else 0.0,
+                'evictions': counters['evictions'], 'entries': entries, 'bytes': size}
+
+    def flush(self):
+        '''
+        Writes the last access times and counters batched by get(). Called by put(), stats() and at exit.
+        '''
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._flush_access(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def clear(self):
+        '''
+        Removes every stored result and resets the counters.
+        '''
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM results')
+            conn.execute('UPDATE counters SET count = 0')
+            conn.execute('COMMIT')
+            self.hits = self.misses = 0
+            self._touched.clear()
+            self._pending = {'hits': 0, 'misses': 0}
+
+    def __call__(self, func):
+        '''
+        Decorates a function so that its results are read from and written to this cache.
+        Calls whose inputs cannot be hashed or whose results cannot be stored (and calls that raise) are passed through uncached.
+        '''
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                key = self.key(func, args, kwargs)
+            except TypeError:
+                return func(*args, **kwargs)
+            hit, value = self.get(key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            try:
+                self.put(key, value)
+            except TypeError:
+                pass
+            return value
+        wrapper.cache = self
+        return wrapper
+
+    def _flush_access(self, conn):
+        # Writes the batched last access times and counters, inside a write transaction of the caller
+        conn.executemany('UPDATE results SET last_access = MAX(last_access, ?) WHERE key = ?',
+                         [(stamp, key) for key, stamp in self._touched.items()])
+        conn.executemany('UPDATE counters SET count = count + ? WHERE name = ?',
+                         [(count, name) for name, count in self._pending.items() if count])
+        self._touched.clear()
+        self._pending = {'hits': 0, 'misses': 0}
+        self._flushed = time.time()
+
+    def _connect(self):
+        # SQLite connections must not cross a fork, so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)')
+            conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, count INTEGER)')
+            conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+            conn.execute('COMMIT')
+            if self._pid is not None:
+                self._touched.clear() #inherited across a fork, already counted by the parent
+                self._pending = {'hits': 0, 'misses': 0}
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+_default_cache = None
+
+def default_cache():
+    '''
+    Returns the cache shared by every function decorated with cached() without an explicit cache.
+    '''
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+def cached(func=None, cache=None):
+    '''
+    Decorator storing the results of a function in a ResultCache (the default cache if none is given).
+    Can be used as @cached, @cached(cache=...) or cached(fanno_losses).
+    '''
+    if func is None:
+        return lambda f: cached(f, cache)
+    if cache is None:
+        cache = default_cache()
+    return cache(func)
+
+def cache_enabled():
+    '''
+    True if the CFF_CACHE environment variable turns on caching of the algos functions.
+    '''
+    return os.environ.get('CFF_CACHE', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+##############################################
+#                  HELPERS                   #
+##############################################
+
+def _flush_at_exit(ref):
+    cache = ref()
+    if cache is not None and cache._pid == os.getpid() and (cache._touched or any(cache._pending.values())):
+        try:
+            cache.flush()
+        except sqlite3.Error:
+            pass
+
+def _dumps(value):
+    # One array per item, plus the container type and the type of each item so the value is rebuilt as it was stored
+    items = list(value) if isinstance(value, (tuple, list)) else [value]
+    arrays = {}
+    types = [type(value).__name__ if isinstance(value, (tuple, list)) else 'value']
+    for i, item in enumerate(items):
+        arr = np.asarray(item)
+        if isinstance(item, (tuple, list)) or arr.dtype.kind not in 'biufc':
+            raise TypeError('Cannot store a %s in the cache' % type(item).__name__)
+        arrays['item%d' % i] = arr
+        types.append('ndarray' if isinstance(item, np.ndarray) else
+                     type(item).__name__ if type(item) in (bool, int, float, complex) else 'numpy')
+    buf = io.BytesIO()
+    np.savez(buf, types=np.array(types), **arrays)
+    return buf.getvalue()
+
+def _loads(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        types = data['types'].tolist()
+        items = []
+        for i, kind in enumerate(types[1:]):
+            arr = data['item%d' % i]
+            items.append(arr if kind == 'ndarray' else arr[()] if kind == 'numpy' else
+                         {'bool': bool, 'int': int, 'float': float, 'complex': complex}[kind](arr))
+    if types[0] == 'value':
+        return items[0]
+    return tuple(items) if types[0] == 'tuple' else items
+
+def _normalize(value, digits):
+    if isinstance(value, (bool, np.bool_, str, type(None))):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float('%.*g' % (digits, value))
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biuf':
+        return ('ndarray', value.shape, tuple(_normalize(v, digits) for v in value.ravel().tolist()))
+    if isinstance(value, Gas):
+        return ('Gas', _normalize(value.gamma, digits), _normalize(value.Rs, digits), _normalize(value.mu, digits))
+    if isinstance(value, Sutherland):
+        return ('Sutherland', _normalize(value.mu_ref, digits), _normalize(value.T_ref, digits), _normalize(value.S, digits))
+    if isinstance(value, (tuple, list)):
+        return tuple(_normalize(v, digits) for v in value)
+    raise TypeError('Cannot build a cache key from %s' % type(value).__name__)
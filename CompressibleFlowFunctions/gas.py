@@ -0,0 +1,135 @@
+import numpy as np
+import sys
+from functools import lru_cache
+
+
+class Sutherland:
+    '''
+    Sutherland viscosity model mu = mu_ref*(T/T_ref)^1.5*(T_ref + S)/(T + S)
+    Expected inputs:
+    mu_ref   : Reference dynamic viscosity, Pa.s
+    T_ref    : Reference temperature, K
+    S        : Sutherland temperature, K
+    '''
+    __slots__ = ('mu_ref', 'T_ref', 'S')
+
+    def __init__(self, mu_ref, T_ref, S):
+        self.mu_ref = mu_ref
+        self.T_ref  = T_ref
+        self.S      = S
+
+    def __call__(self, T):
+        return self.mu_ref*(T/self.T_ref)**1.5*(self.T_ref + self.S)/(T + self.S)
+
+    def __repr__(self):
+        return 'Sutherland(%r, %r, %r)' % (self.mu_ref, self.T_ref, self.S)
+
+
+class Gas:
+    '''
+    Ideal gas with the gamma-dependent constants of the flow relations computed once.
+    Any function of Isentropic.py, Fanno.py and NSW.py accepts a Gas in place of gamma, and Rs may then be passed as None.
+    Gas objects are immutable; gamma may be an array.
+    Expected inputs:
+    gamma    : Ratio of specific heats
+    Rs       : Specific gas constant, J/kgK (optional)
+    mu       : Dynamic viscosity, Pa.s, as a constant or a function of temperature such as Sutherland (optional)
+    name     : Name of the gas (optional)
+    '''
+    __slots__ = ('gamma', 'Rs', 'mu', 'name',
+                 'gm1', 'gp1', 'half_gm1', 'inv_gm1', 'g_gm1', 'gp1_2gm1', 'gp1_2g', 'two_gp1',
+                 'sqrt_g_Rs', 'mass_factor')
+
+    def __init__(self, gamma, Rs=None, mu=None, name=None):
+        gm1 = gamma - 1
+        gp1 = gamma + 1
+        for attr, val in (('gamma', gamma), ('Rs', Rs), ('mu', mu), ('name', name),
+                          ('gm1', gm1),                        # gamma-1
+                          ('gp1', gp1),                        # gamma+1
+                          ('half_gm1', gm1/2),                 # (gamma-1)/2
+                          ('inv_gm1', 1/gm1),                  # 1/(gamma-1)
+                          ('g_gm1', gamma/gm1),                # gamma/(gamma-1), isentropic pressure exponent
+                          ('gp1_2gm1', gp1/(2*gm1)),           # (gamma+1)/(2(gamma-1)), area ratio exponent
+                          ('gp1_2g', gp1/(2*gamma)),           # (gamma+1)/(2gamma), Fanno log coefficient
+                          ('two_gp1', 2/gp1),                  # 2/(gamma+1)
+                          ('sqrt_g_Rs', np.sqrt(gamma/Rs) if Rs is not None else None),
+                          ('mass_factor', (2/gp1)**(gp1/(2*gm1))),  # choked mass flow term (2/(gamma+1))^((gamma+1)/(2(gamma-1)))
+                          ):
+            object.__setattr__(self, attr, val)
+
+    def __setattr__(self, attr, val):
+        raise AttributeError('Gas objects are immutable, create a new Gas instead')
+
+    def __reduce__(self):
+        return (Gas, (self.gamma, self.Rs, self.mu, self.name))
+
+    def __repr__(self):
+        return 'Gas(gamma=%r, Rs=%r, mu=%r, name=%r)' % (self.gamma, self.Rs, self.mu, self.name)
+
+    def viscosity(self, T):
+        '''
+        Dynamic viscosity at temperature T, Pa.s
+        '''
+        if self.mu is None:
+            raise ValueError('No viscosity model was given for %s' % (self.name or 'this gas'))
+        if callable(self.mu):
+            return self.mu(T)
+        return self.mu + 0*T
+
+    def sqrt_g_RT(self, To, Rs=None):
+        '''
+        Mass flux factor sqrt(gamma/(Rs*To)), from the precomputed sqrt(gamma/Rs) of the gas when Rs is not given
+        '''
+        if Rs is None:
+            return self.sqrt_g_Rs*To**-0.5 #cheaper than np.sqrt for scalar To
+        return np.sqrt(self.gamma/(Rs*To))
+
+    def sound_speed(self, T):
+        '''
+        Speed of sound at static temperature T, m/s
+        '''
+        return np.sqrt(self.gamma*self.Rs*T)
+
+
+def as_gas(gamma):
+    '''
+    Returns gamma unchanged if it is a Gas, otherwise a Gas built from the ratio of specific heats.
+    Gas objects for scalar gamma are reused between calls.
+    Expected inputs:
+    gamma    : Gas or ratio of specific heats
+
+    Returns: gas
+    '''
+    if isinstance(gamma, Gas):
+        return gamma
+    try:
+        return _gas_from_float(gamma)
+    except TypeError: #arrays are unhashable
+        return Gas(np.asarray(gamma, dtype=float))
+
+@lru_cache(maxsize=64)
+def _gas_from_float(gamma):
+    return Gas(gamma)
+
+##############################################
+#                GAS LIBRARY                 #
+##############################################
+
+###Gas constants and Sutherland viscosity coefficients referenced to 273.15 K
+
+AIR      = Gas(1.4,   287.05, Sutherland(1.716e-5, 273.15, 110.4), 'air')
+NITROGEN = Gas(1.4,   296.80, Sutherland(1.663e-5, 273.15, 106.7), 'nitrogen')
+OXYGEN   = Gas(1.395, 259.84, Sutherland(1.919e-5, 273.15, 139.0), 'oxygen')
+HYDROGEN = Gas(1.405, 4124.2, Sutherland(8.411e-6, 273.15, 97.0),  'hydrogen')
+HELIUM   = Gas(5/3,   2077.1, Sutherland(1.870e-5, 273.15, 79.4),  'helium')
+
+gases = {gas.name: gas for gas in (AIR, NITROGEN, OXYGEN, HYDROGEN, HELIUM)}
+
+def get_gas(name):
+    '''
+    Looks a gas up in the library by name: 'air', 'nitrogen', 'oxygen', 'hydrogen' or 'helium'.
+    '''
+    try:
+        return gases[name.lower()]
+    except KeyError:
+        raise ValueError('Unknown gas "%s", expected one of %s' % (name, ', '.join(gases)))
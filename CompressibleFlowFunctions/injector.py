@@ -0,0 +1,162 @@
+import numpy as np
+import sys
+from CompressibleFlowFunctions.Isentropic import *
+from CompressibleFlowFunctions.misc import *
+
+
+###Injector and manifold models. All inputs in SI units (Pa, K, m, kg/s) and every input may be an array.
+###Orifice flow is evaluated with closed-form choked/unchoked relations, so manifolds with thousands of holes
+###are solved without any per-hole root solve.
+
+def critical_pressure_ratio(gamma):
+    '''
+    Calculates the back pressure to stagnation pressure ratio below which an orifice or nozzle is choked, (2/(gamma+1))^(gamma/(gamma-1))
+    Expected inputs:
+    gamma    : Ratio of specific heats
+
+    Returns: Pratio_crit
+    '''
+    g = as_gas(gamma)
+    return g.two_gp1**g.g_gm1
+
+def orifice_mdot(Po,Pb,To,Rs,gamma,Cd,A):
+    '''
+    Calculates the mass flow rate through an orifice, choked or not, from the upstream stagnation pressure and the back pressure.
+    Expected inputs:
+    Po       : Upstream stagnation pressure, Pa
+    Pb       : Back pressure, Pa
+    To       : Stagnation temperature, K
+    Rs       : Specific gas constant, J/kgK
+    gamma    : Ratio of specific heats
+    Cd       : Discharge coefficient
+    A        : Orifice area, sq. m
+
+    Returns: mdot, choked
+    '''
+    g = as_gas(gamma)
+    if Rs is None:
+        Rs = g.Rs
+    Po     = np.asarray(Po, dtype=float)
+    r      = np.clip(Pb/Po, 0, 1)
+    choked = r <= critical_pressure_ratio(g)
+    mdot_choked = Cd*mdot_from_throat_area(A,Po,Rs,To,g)
+    mdot_sub    = Cd*A*Po*np.sqrt(2*g.g_gm1/(Rs*To)*np.maximum(r**(2/g.gamma) - r**(g.gp1/g.gamma), 0))
+    mdot = np.where(choked, mdot_choked, mdot_sub)
+    return mdot[()], choked[()]
+
+def holes_for_mdot(mdot,Po,Rs,To,gamma,Dhole,Cd=1):
+    '''
+    Sizes an injector with uniform choked holes: the choked area from throat_area_from_mdot, corrected by the discharge coefficient, divided into holes with hole_numbers.
+    Expected inputs:
+    mdot     : Mass flow rate, kg/s
+    Po       : Stagnation pressure upstream of the holes, Pa
+    Rs       : Specific gas constant, J/kgK
+    To       : Stagnation temperature, K
+    gamma    : Ratio of specific heats
+    Dhole    : Hole diameter, m
+    Cd       : Discharge coefficient of the holes
+
+    Returns: numholes, Astar
+    '''
+    Astar    = throat_area_from_mdot(mdot,Po,Rs,To,gamma)/Cd
+    numholes = hole_numbers(Dhole,Astar)
+    return numholes, Astar
+
+def manifold_distribution(Po_supply,Pc,To,Rs,gamma,Dhole,Cd,Dmanifold,spacing,nholes=None,fanning=0.005,K=0,tol=1e-4,maxiter=100):
+    '''
+    Solves the flow split of a dead-ended manifold feeding a row of orifices into a chamber, for arrays of supply conditions.
+    The manifold is fed at one end and loses pressure along each segment between holes as (4f*spacing/Dmanifold + K)*m^2/(2*rho*Amanifold^2),
+    where m is the flow still carried by the segment and rho is taken at the downstream end of the segment. Each hole is choked or
+    unchoked depending on its local manifold pressure.
+    For a trial total flow the manifold is marched from the inlet to the dead end, hole by hole, for all cases at once; the
+    total flow that leaves nothing at the dead end is then found by a vectorized Illinois (regula falsi) iteration, safeguarded
+    by bisection. The manifold pressure never falls below Pc; cases that still leave more than tol of the total flow unplaced at
+    the dead end (or with Po_supply <= Pc) are not converged and return nan.
+    Expected inputs:
+    Po_supply : Supply stagnation pressure at the manifold inlet, Pa. Scalar or array of cases
+    Pc        : Chamber (back) pressure, Pa. Scalar or array of cases
+    To        : Stagnation temperature, K. Scalar or array of cases
+    Rs        : Specific gas constant, J/kgK
+    gamma     : Ratio of specific heats
+    Dhole     : Hole diameters, m. Scalar or array with one value per hole, ordered from the manifold inlet
+    Cd        : Discharge coefficients. Scalar or array with one value per hole
+    Dmanifold : Manifold diameter, m
+    spacing   : Manifold length between consecutive holes (and from the inlet to the first hole), m. Scalar or array per hole
+    nholes    : Number of holes, required if Dhole, Cd and spacing are all scalars
+    fanning   : Fanning friction factor of the manifold
+    K         : Minor loss coefficient of each segment
+    tol       : Convergence tolerance on the flow left unplaced at the dead end, relative to the total flow. With high manifold
+                losses the pressure nears Pc well before the dead end and tolerances much below 1e-5 may not be reached
+    maxiter   : Maximum number of iterations
+
+    Returns: mdot_holes, P_manifold, choked, mdot_total, converged
+    mdot_holes, P_manifold and choked have shape (number of cases, number of holes)
+    '''
+    g = as_gas(gamma)
+    if Rs is None:
+        Rs = g.Rs
+    if nholes is None:
+        nholes = max(np.size(Dhole), np.size(Cd), np.size(spacing))
+    Po_supply, Pc, To = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=float)) for x in (Po_supply, Pc, To)))
+    CdA  = np.broadcast_to(np.asarray(Cd, dtype=float)*np.pi*np.asarray(Dhole, dtype=float)**2/4, (nholes,))
+    kseg = np.broadcast_to((4*fanning*np.asarray(spacing, dtype=float)/Dmanifold + K)/(2*(np.pi*Dmanifold**2/4)**2), (nholes,))
+    RT   = Rs*To
+    c_choked = g.mass_factor*np.sqrt(g.gamma/RT)
+    c_sub    = np.sqrt(2*g.g_gm1/RT)
+    r_crit   = critical_pressure_ratio(g)
+
+    def hole_flow(i, p):
+        r = np.minimum(Pc/p, 1)
+        return CdA[i]*p*np.where(r <= r_crit, c_choked, c_sub*np.sqrt(np.maximum(r**(2/g.gamma) - r**(g.gp1/g.gamma), 0)))
+
+    def march(mdot_total):
+        #Pressure at every hole and flow left at the dead end for a given total flow. Each segment loss is
+        #p_up - p_down = k*m^2*RT/p_down, solved for p_down. The manifold pressure cannot fall below Pc: once it reaches Pc
+        #(or a segment cannot carry m at all) the downstream holes pass nothing and the flow still carried is left unplaced
+        P = np.empty((mdot_total.size, nholes))
+        p = Po_supply
+        m = mdot_total
+        blocked = np.zeros(mdot_total.shape, dtype=bool)
+        for i in range(nholes):
+            disc = p*p - 4*kseg[i]*RT*np.maximum(m, 0)**2 #once the holes have taken more than the total flow m < 0 and stays so
+            blocked = blocked | (disc < 0)
+            p = np.where(blocked, Pc, np.maximum(0.5*(p + np.sqrt(np.maximum(disc, 0))), Pc))
+            P[:,i] = p
+            m = m - hole_flow(i, p)
+        return P, m
+
+    #The flow left at the dead end grows monotonically with the total flow, which lies between 0 and the choked flow of
+    #every hole at the supply pressure. Marching from the inlet stays well conditioned when manifold losses are high
+    valid = Po_supply > Pc
+    a = np.zeros(Po_supply.shape)
+    b = Po_supply*np.sum(CdA)*c_choked
+    fa, fb = march(a)[1], march(b)[1]
+    side = np.zeros(a.shape)
+    x = b.copy()
+    best, fbest = b.copy(), np.abs(fb)
+    width = b - a
+    converged = ~valid
+    for _ in range(maxiter):
+        if np.all(converged):
+            break
+        #Illinois step, replaced by a bisection step wherever the last step did not halve the bracket
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_rf = (a*fb - b*fa)/(fb - fa)
+        x_rf = np.where((x_rf > a) & (x_rf < b), x_rf, 0.5*(a + b))
+        x  = np.where(converged, x, np.where(b - a > 0.5*width, 0.5*(a + b), x_rf))
+        width = b - a
+        fx = march(x)[1]
+        improved = np.abs(fx) < fbest
+        best, fbest = np.where(improved, x, best), np.where(improved, np.abs(fx), fbest)
+        #With high losses the pressure nears Pc well before the dead end and the flow left there is very sensitive to the
+        #total flow, so the iteration also stops once the bracket has shrunk to rounding
+        converged = converged | (np.abs(fx) <= tol*x) | (b - a <= 4*np.finfo(float).eps*b)
+        upper = fx > 0 #root lies in [a, x]
+        b, fb, fa = np.where(upper, x, b), np.where(upper, fx, fb), np.where(upper, fa*np.where(side == 1, 0.5, 1), fa)
+        a, fa, fb = np.where(upper, a, x), np.where(upper, fa, fx), np.where(upper, fb, fb*np.where(side == -1, 0.5, 1))
+        side = np.where(upper, 1, -1)
+    P = march(best)[0] #iterate leaving the least flow unplaced
+    converged = valid & (fbest <= tol*best) & np.all(np.isfinite(P), axis=1)
+    P = np.where(converged[:,None], P, np.nan) #never hand back unconverged values
+    mdot, choked = orifice_mdot(P,Pc[:,None],To[:,None],Rs,g,CdA,1)
+    return mdot, P, choked, mdot.sum(axis=1), converged
@@ -0,0 +1,278 @@
+import numpy as np
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import http.client
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from CompressibleFlowFunctions.batch import resolve_function, output_names, evaluate_chunk
+
+
+###Local calculation service. Concurrent single-point requests for the same function are coalesced into one
+###vectorized batch (see batch.evaluate_chunk) within a short time window and evaluated on a worker pool.
+###The server only listens on the loopback interface or a Unix socket and needs no network access.
+###
+###  POST /call     {"function": "Isentropic.mach_from_G", "args": {"Po": 5e5, ...}}
+###  GET  /metrics  latency and throughput metrics
+###  GET  /health
+
+SERVICE_MODULES = ('Isentropic', 'Fanno', 'NSW', 'Expansion', 'misc', 'algos', 'geometry', 'valve', 'injector')
+
+class BatchingService:
+    '''
+    Coalesces concurrent calls into vectorized batches and evaluates them on a worker pool.
+    Expected inputs:
+    window    : Time to wait for more calls of the same function before a batch is evaluated, s
+    max_batch : Batch size that triggers an immediate evaluation
+    workers   : Number of workers in the pool
+    processes : Evaluate batches in worker processes (True) or threads (False)
+    '''
+    def __init__(self, window=0.002, max_batch=1024, workers=None, processes=True):
+        self.window = window
+        self.max_batch = max_batch
+        self.pool = ProcessPoolExecutor(workers) if processes else ThreadPoolExecutor(workers)
+        self.pending = {}
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.latencies = deque(maxlen=10000)
+
+    async def call(self, spec, args):
+        '''
+        Queues one call and waits for the batch holding it to be evaluated.
+
+        Returns: dictionary with status, result, outputs (output names) and error
+        '''
+        t0 = time.perf_counter()
+        modname = spec.rpartition('.')[0]
+        if modname not in SERVICE_MODULES:
+            raise ValueError('Module "%s" is not served, expected one of %s' % (modname, ', '.join(SERVICE_MODULES)))
+        func = resolve_function(spec)
+        numeric = {}
+        constants = {}
+        for name, val in args.items():
+            if isinstance(val, (int, float)) and not isinstance(val, bool):
+                numeric[name] = float(val)
+            else:
+                constants[name] = val
+        #Only calls with the same function, numeric arguments and non-numeric values can share a batch
+        key = (spec, tuple(sorted(numeric)), json.dumps(constants, sort_keys=True))
+        future = asyncio.get_running_loop().create_future()
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = []
+            asyncio.get_running_loop().call_later(self.window, self._flush, key)
+        batch.append((numeric, future))
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        outputs, status, error = await future
+
+        self.requests += 1
+        self.latencies.append(time.perf_counter() - t0)
+        if status != 'ok':
+            self.errors += 1
+        result = outputs[0] if len(outputs) == 1 else outputs
+        return {'status': status, 'result': result, 'outputs': output_names(func, len(outputs) or None), 'error': error}
+
+    def _flush(self, key):
+        batch = self.pending.pop(key, None)
+        if batch:
+            asyncio.ensure_future(self._evaluate(key, batch))
+
+    async def _evaluate(self, key, batch):
+        spec, names, constants = key
+        columns = {name: np.array([numeric[name] for numeric, _ in batch]) for name in names}
+        if not names:
+            columns = {'_row': np.zeros(len(batch))}
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        try:
+            outputs, status, error = await asyncio.get_running_loop().run_in_executor(
+                self.pool, evaluate_chunk, spec, columns, None, json.loads(constants))
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(([float(out[i]) for out in outputs], status[i], error[i]))
+        except Exception as e: #e.g. a broken worker pool; every waiting call must still get a reply
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def metrics(self):
+        '''
+        Reports request counts, batching, latency and throughput since the service started.
+
+        Returns: dictionary of metrics
+        '''
+        uptime = time.perf_counter() - self.started
+        lat = np.array(self.latencies)*1000
+        return {'uptime_s': uptime, 'requests': self.requests, 'errors': self.errors, 'batches': self.batches,
+                'mean_batch_size': self.requests/self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch_seen,
+                'throughput_rps': self.requests/uptime if uptime else 0.0,
+                'latency_ms': {'mean': float(lat.mean()) if lat.size else 0.0,
+                               'p50': float(np.percentile(lat, 50)) if lat.size else 0.0,
+                               'p95': float(np.percentile(lat, 95)) if lat.size else 0.0,
+                               'p99': float(np.percentile(lat, 99)) if lat.size else 0.0}}
+
+    def close(self):
+        self.pool.shutdown()
+
+async def start_server(service, host='127.0.0.1', port=8765, unix_socket=None):
+    '''
+    Starts serving a BatchingService over HTTP/JSON on a local TCP port, or on a Unix socket if unix_socket is given.
+
+    Returns: server (asyncio.Server)
+    '''
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode('latin-1').strip()
+                    if not line:
+                        break
+                    name, _, val = line.partition(':')
+                    headers[name.strip().lower()] = val.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                code, payload = await _route(service, method, path, body)
+                data = json.dumps(_json_safe(payload), allow_nan=False).encode()
+                writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n'
+                             % (code, http.client.responses[code].encode(), len(data)) + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    if unix_socket:
+        return await asyncio.start_unix_server(handle, unix_socket)
+    return await asyncio.start_server(handle, host, port)
+
+def serve(host='127.0.0.1', port=8765, unix_socket=None, window=0.002, max_batch=1024, workers=None, processes=True):
+    '''
+    Runs the calculation service until interrupted.
+    '''
+    async def run():
+        service = BatchingService(window, max_batch, workers, processes)
+        server = await start_server(service, host, port, unix_socket)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            service.close()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+class ServiceClient:
+    '''
+    Client of the calculation service. Keeps one connection open; use one client per thread.
+    Expected inputs:
+    host        : Host of the service
+    port        : Port of the service
+    unix_socket : Path of the Unix socket of the service, used instead of host and port if given
+    '''
+    def __init__(self, host='127.0.0.1', port=8765, unix_socket=None, timeout=60):
+        if unix_socket:
+            self.conn = _UnixHTTPConnection(unix_socket, timeout)
+        else:
+            self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def call(self, spec, /, **args):
+        '''
+        Evaluates a library function on the service, e.g. client.call('Isentropic.mach_from_G', Po=5e5, ...).
+        Raises RuntimeError if the evaluation failed.
+
+        Returns: result
+        '''
+        reply = self.request('POST', '/call', {'function': spec, 'args': args})
+        if reply['status'] == 'error':
+            raise RuntimeError(reply['error'])
+        return reply['result']
+
+    def metrics(self):
+        return self.request('GET', '/metrics')
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.conn.request(method, path, body, {'Content-Type': 'application/json'})
+        response = self.conn.getresponse()
+        reply = json.loads(response.read())
+        if response.status >= 400:
+            raise RuntimeError(reply.get('error', response.reason))
+        return reply
+
+    def close(self):
+        self.conn.close()
+
+def main(argv=None):
+    '''
+    Entry point of the cff-serve command. Run "cff-serve --help" for usage.
+    '''
+    parser = argparse.ArgumentParser(prog='cff-serve', description='Serve CompressibleFlowFunctions over local HTTP/JSON with request batching.')
+    parser.add_argument('--port', type=int, default=8765, help='Port on 127.0.0.1 (default 8765)')
+    parser.add_argument('--unix-socket', default=None, help='Listen on this Unix socket instead of a TCP port')
+    parser.add_argument('--window', type=float, default=0.002, help='Batching window in seconds (default 0.002)')
+    parser.add_argument('--max-batch', type=int, default=1024, help='Batch size evaluated without waiting for the window (default 1024)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker pool size (default: number of CPUs)')
+    parser.add_argument('--threads', action='store_true', help='Use worker threads instead of processes')
+    args = parser.parse_args(argv)
+    serve('127.0.0.1', args.port, args.unix_socket, args.window, args.max_batch, args.workers, not args.threads)
+    return 0
+
+##############################################
+#                  HELPERS                   #
+##############################################
+
+async def _route(service, method, path, body):
+    if method == 'GET' and path == '/health':
+        return 200, {'status': 'ok'}
+    if method == 'GET' and path == '/metrics':
+        return 200, service.metrics()
+    if method == 'POST' and path == '/call':
+        try:
+            request = json.loads(body)
+            return 200, await service.call(request['function'], request.get('args', {}))
+        except (ValueError, KeyError, TypeError, ImportError) as e:
+            return 400, {'status': 'error', 'error': '%s: %s' % (type(e).__name__, e)}
+        except Exception as e:
+            service.requests += 1
+            service.errors += 1
+            return 500, {'status': 'error', 'error': '%s: %s' % (type(e).__name__, e)}
+    return 404, {'status': 'error', 'error': 'No route for %s %s' % (method, path)}
+
+def _json_safe(obj):
+    #NaN and inf are not valid JSON; nonfinite results are sent as null
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _json_safe(val) for key, val in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(val) for val in obj]
+    return obj
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import numpy as np
+import sys
+from CompressibleFlowFunctions.Isentropic import *
+from CompressibleFlowFunctions.misc import *
+
+
+###Array-native valve model. The Cv relation of misc.flowrates, 42.2*Cv*sqrt((P1-P2)*(P1+P2))/sqrt(SG) = Q,
+###is solved in closed form for either pressure, so no root solve is needed and every input may be an array.
+###Pressures in PSI, Q in SCFH (see mdot_to_scfh), as in misc.py and algos.py
+
+def valve_p2(P1,Cv,SG,Q):
+    '''
+    Calculates the pressure downstream of a flow device rated by Cv, solving flowrates() in closed form.
+    The flow is choked when Q reaches the capacity of flowrates_choked(), 42.2*0.87*Cv*P1/sqrt(SG), or when P2 < P1/2,
+    consistent with valve_p1. P2 is still the solution of flowrates() there, as returned by algos.valve_losses; it is nan only
+    beyond the P2 = 0 limit of flowrates(), where Q exceeds 42.2*Cv*P1/sqrt(SG) and flowrates() has no solution.
+    Expected inputs:
+    P1       : Upstream pressure, PSI
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    Q        : Volumetric flow rate, SCFH (see mdot_to_scfh)
+
+    Returns: P2, choked
+    '''
+    P1  = np.asarray(P1, dtype=float)
+    dP2 = (Q*np.sqrt(SG)/(42.2*Cv))**2 #P1^2 - P2^2
+    with np.errstate(invalid='ignore'):
+        P2 = np.sqrt(P1*P1 - dP2)
+    #flowrates() reaches P2 = P1/2 at 42.2*0.866*Cv*P1/sqrt(SG), just below the choked capacity, so both tests are kept
+    choked = (flowrates_choked(Cv,SG,Q) >= P1) | ~(P2 >= P1/2)
+    return P2[()], choked[()]
+
+def valve_p1(P2,Cv,SG,Q):
+    '''
+    Calculates the pressure upstream of a flow device rated by Cv, solving flowrates() in closed form.
+    When the required upstream pressure exceeds 2*P2 the device is choked and the upstream pressure is given by flowrates_choked().
+    Expected inputs:
+    P2       : Downstream pressure, PSI
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    Q        : Volumetric flow rate, SCFH (see mdot_to_scfh)
+
+    Returns: P1, choked
+    '''
+    P2     = np.asarray(P2, dtype=float)
+    P1     = np.sqrt(P2*P2 + (Q*np.sqrt(SG)/(42.2*Cv))**2)
+    choked = P1 > 2*P2
+    P1     = np.where(choked, flowrates_choked(Cv,SG,Q), P1)
+    return P1[()], choked[()]
+
+def valve_forward(P1,Cv,SG,Q,mdot,Rs,To,gamma,Apipe):
+    '''
+    Calculates the conditions downstream of a flow device rated by Cv knowing the upstream pressure. Vectorized replacement for the root solves of algos.valve_losses.
+    Where the device is choked the outputs are still those of the flowrates() solution; only the choked flag reports it.
+    Expected inputs:
+    P1       : Upstream static pressure, PSI
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    Q        : Volumetric flow rate, SCFH (see mdot_to_scfh)
+    mdot     : Mass flow rate, kg/s
+    Rs       : Specific gas constant, J/kgK
+    To       : Stagnation temperature, K
+    gamma    : Ratio of specific heats
+    Apipe    : Cross-sectional area of the downstream pipe, sq. m
+
+    Returns: P2, M2, Po2, choked
+    '''
+    P2, choked = valve_p2(P1,Cv,SG,Q)
+    M2  = mach_from_mass_static(mdot,P2*101325/14.7,Rs,To,gamma,Apipe)
+    Po2 = po_from_pratio(P2,gamma,M2)
+    return P2, M2, Po2, choked
+
+def valve_backward(P2,Cv,SG,Q,mdot,Rs,To,gamma,Apipe):
+    '''
+    Calculates the conditions upstream of a flow device rated by Cv knowing the downstream pressure. Vectorized replacement for the root solves of algos.valve_losses_backwards.
+    Expected inputs:
+    P2       : Downstream static pressure, PSI
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    Q        : Volumetric flow rate, SCFH (see mdot_to_scfh)
+    mdot     : Mass flow rate, kg/s
+    Rs       : Specific gas constant, J/kgK
+    To       : Stagnation temperature, K
+    gamma    : Ratio of specific heats
+    Apipe    : Cross-sectional area of the upstream pipe, sq. m
+
+    Returns: P1, Po1, M1, choked
+    '''
+    P1, choked = valve_p1(P2,Cv,SG,Q)
+    M1  = mach_from_mass_static(mdot,P1*101325/14.7,Rs,To,gamma,Apipe)
+    Po1 = po_from_pratio(P1,gamma,M1)
+    return P1, Po1, M1, choked
+
+##############################################
+#      ISA/IEC 60534 COMPRESSIBLE SIZING     #
+##############################################
+
+###US customary form of the gas sizing equation: Q = N7*Cv*P1*Y*sqrt(x/(SG*T1*Z)), N7 = 1360 for SCFH, psia and degrees Rankine
+N7 = 1360
+
+def iec_expansion_factor(P1,P2,gamma,xT=0.72):
+    '''
+    Calculates the ISA/IEC 60534 expansion factor Y = 1 - x/(3*Fgamma*xT), limiting the pressure drop ratio x to its choked value Fgamma*xT.
+    Expected inputs:
+    P1       : Upstream pressure, psia
+    P2       : Downstream pressure, psia
+    gamma    : Ratio of specific heats
+    xT       : Pressure differential ratio factor of the valve at choked flow (0.72 is typical of globe valves)
+
+    Returns: Y, x, choked
+    '''
+    Fgamma = gamma/1.4
+    x      = (P1 - np.asarray(P2, dtype=float))/P1
+    choked = x >= Fgamma*xT
+    x      = np.minimum(x, Fgamma*xT)
+    Y      = 1 - x/(3*Fgamma*xT)
+    return Y[()], x[()], choked[()]
+
+def iec_valve_flow(P1,P2,Cv,SG,T1,gamma,xT=0.72,Z=1):
+    '''
+    Calculates the gas flow rate through a valve with the ISA/IEC 60534 compressible sizing equation.
+    Expected inputs:
+    P1       : Upstream pressure, psia
+    P2       : Downstream pressure, psia
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    T1       : Upstream temperature, K
+    gamma    : Ratio of specific heats
+    xT       : Pressure differential ratio factor of the valve at choked flow
+    Z        : Compressibility factor
+
+    Returns: Q, Y, choked
+    '''
+    Y, x, choked = iec_expansion_factor(P1,P2,gamma,xT)
+    Q = N7*Cv*P1*Y*np.sqrt(x/(SG*T1*1.8*Z))
+    return Q, Y, choked
+
+def iec_valve_cv(P1,P2,SG,T1,gamma,Q,xT=0.72,Z=1):
+    '''
+    Calculates the flow coefficient a valve needs to pass a gas flow rate with the ISA/IEC 60534 compressible sizing equation.
+    Expected inputs:
+    P1       : Upstream pressure, psia
+    P2       : Downstream pressure, psia
+    SG       : Specific gravity w.r.t. air
+    T1       : Upstream temperature, K
+    gamma    : Ratio of specific heats
+    Q        : Volumetric flow rate, SCFH
+    xT       : Pressure differential ratio factor of the valve at choked flow
+    Z        : Compressibility factor
+
+    Returns: Cv, Y, choked
+    '''
+    Y, x, choked = iec_expansion_factor(P1,P2,gamma,xT)
+    Cv = Q/(N7*P1*Y*np.sqrt(x/(SG*T1*1.8*Z)))
+    return Cv, Y, choked
+
+def iec_valve_p2(P1,Cv,SG,T1,gamma,Q,xT=0.72,Z=1):
+    '''
+    Calculates the downstream pressure of a valve passing a gas flow rate with the ISA/IEC 60534 compressible sizing equation.
+    With s = sqrt(x) the sizing equation is the cubic s - s^3/(3*Fgamma*xT) = Q/(N7*Cv*P1*sqrt(1/(SG*T1*Z))), solved here in closed form.
+    P2 is nan where the flow rate exceeds the choked capacity of the valve.
+    Expected inputs:
+    P1       : Upstream pressure, psia
+    Cv       : Flow coefficient
+    SG       : Specific gravity w.r.t. air
+    T1       : Upstream temperature, K
+    gamma    : Ratio of specific heats
+    Q        : Volumetric flow rate, SCFH
+    xT       : Pressure differential ratio factor of the valve at choked flow
+    Z        : Compressibility factor
+
+    Returns: P2, choked
+    '''
+    c      = gamma/1.4*xT #choked pressure drop ratio Fgamma*xT
+    q      = Q/(N7*Cv*P1*np.sqrt(1/(SG*T1*1.8*Z)))
+    arg    = -3*q/(2*np.sqrt(c))
+    choked = np.asarray(arg <= -1)
+    with np.errstate(invalid='ignore'):
+        s  = 2*np.sqrt(c)*np.cos(np.arccos(np.where(arg < -1, np.nan, arg))/3 - 2*np.pi/3)
+    P2     = P1*(1 - s*s)
+    return P2[()], choked[()]
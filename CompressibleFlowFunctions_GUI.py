@@ -51,11 +51,13 @@ class FlowFunctionGUI(tk.Tk):
             "Isentropic": [
                 "mdot_from_throat_area", "throat_area_from_mdot", "astar_all_else_known", "mach_from_G",
                 "mach_from_aratio", "aratio_from_mach", "po_from_pratio",
-                "p_from_pratio", "T_from_Tratio", "To_from_Tratio", "delta_mass_static"
+                "p_from_pratio", "T_from_Tratio", "To_from_Tratio", "delta_mass_static",
+                "mach_from_mass_static"
             ],
             "Fanno": [
                 "colebrook_white", "fanno_equation", "delta_fanno",
-                "Lstar_fanno", "mach_fanno", "fanno_po_ratio"
+                "Lstar_fanno", "mach_fanno", "fanno_po_ratio",
+                "fanno_phi_max", "mach_from_fanno", "fanno_duct"
             ],
             "NSW": [
                 "prat_from_mach", "mach_from_pressure_ratio", "mach_after_shock",
@@ -108,6 +110,7 @@ class FlowFunctionGUI(tk.Tk):
             "fluid": "name",
             "G": "(dimensionless)",
             "Dhole": "same as Astar",
+            "PHI": "4fL*/D",
             "A": "m²"
         }
         # Function descriptions
@@ -123,6 +126,7 @@ class FlowFunctionGUI(tk.Tk):
             "T_from_Tratio": "Calculates static temperature from stagnation temperature and Mach number.",
             "To_from_Tratio": "Calculates stagnation temperature from static temperature and Mach number.",
             "delta_mass_static": "Iterative equation for choked flow using mass flow and static pressure.",
+            "mach_from_mass_static": "Closed-form subsonic Mach number from mass flow and static pressure (inverse of delta_mass_static).",
 
             "colebrook_white": "Computes the Colebrook-White equation for Darcy friction factor.",
             "fanno_equation": "Calculates the Fanno equation value for a given Mach number and gamma.",
@@ -130,6 +134,9 @@ class FlowFunctionGUI(tk.Tk):
             "Lstar_fanno": "Directly calculates the Fanno choking length (L*) for given conditions.",
             "mach_fanno": "Calculates Mach number for a given pipe length using the Fanno equation.",
             "fanno_po_ratio": "Calculates the Fanno stagnation pressure ratio for a given Mach number and gamma.",
+            "fanno_phi_max": "Calculates the limit of 4fL*/D as M tends to infinity (longest supersonic Fanno duct).",
+            "mach_from_fanno": "Inverts the Fanno equation on the subsonic or supersonic branch.",
+            "fanno_duct": "Solves a duct with friction, locating the normal shock for choked supersonic inlets (regime, x_shock, Mx, My, M2, Po2/Po1).",
 
             "prat_from_mach": "Calculates the stagnation pressure ratio across a normal shock wave.",
             "mach_from_pressure_ratio": "Calculates the pre-shock Mach number for a desired stagnation pressure ratio.",
@@ -159,13 +166,17 @@ class FlowFunctionGUI(tk.Tk):
             "T_from_Tratio": ["To", "gamma", "M"],
             "To_from_Tratio": ["T", "gamma", "M"],
             "delta_mass_static": ["M", "mdot", "P", "Rs", "To", "gamma", "A"],
+            "mach_from_mass_static": ["mdot", "P", "Rs", "To", "gamma", "A"],
 
             "colebrook_white": ["f", "Re", "D", "epsilon"],
             "fanno_equation": ["M", "gamma"],
             "delta_fanno": ["M", "L", "f", "D", "gamma"],
             "Lstar_fanno": ["f", "D", "M", "gamma"],
-            "mach_fanno": ["L", "f", "D", "gamma"],
+            "mach_fanno": ["L", "f", "D", "gamma", "subsuper"],
             "fanno_po_ratio": ["M", "gamma"],
+            "fanno_phi_max": ["gamma"],
+            "mach_from_fanno": ["PHI", "gamma", "subsuper"],
+            "fanno_duct": ["M1", "L", "f", "D", "gamma"],
 
             "prat_from_mach": ["gamma", "M"],
             "mach_from_pressure_ratio": ["Po1", "Po2", "gamma"],
@@ -0,0 +1,77 @@
+import os
+import sys
+import timeit
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from scipy.optimize import bisect
+from CompressibleFlowFunctions.Isentropic import *
+from CompressibleFlowFunctions.Fanno import *
+from CompressibleFlowFunctions.NSW import *
+
+
+###Compares the residual functions and root solvers called with a float gamma against the same calls with a Gas,
+###whose gamma-dependent constants are computed once (Rs is passed as None with a Gas, so sqrt(gamma/Rs) is reused).
+###The residuals and solvers are also timed against their float-only forms from before Gas was introduced, copied below.
+###Run with: python benchmarks/bench_gas.py
+
+N = 20000
+gas = Gas(1.4, 287.05)
+
+def _rs(g):
+    return None if isinstance(g, Gas) else 287.05
+
+def _delta_mass_static(M,mdot,P,Rs,To,gamma,A):
+    return mdot - P*(1+(gamma-1)/2*M*M)**(gamma/(gamma-1))*A*np.sqrt(gamma/(Rs*To))*M*(1+(gamma-1)/2*M*M)**(-(gamma+1)/(2*(gamma-1)))
+
+def _fanno_equation(M,gamma):
+    return ((1-M**2)/(gamma*M**2) + (gamma+1)/(2*gamma)*np.log(((gamma+1)*M**2)/(2*(1+(gamma-1)/2*M**2))))
+
+def _delta_fanno(M,L,f,D,gamma):
+    return ((1-M**2)/(gamma*M**2) + (gamma+1)/(2*gamma)*np.log(((gamma+1)*M**2)/(2*(1+(gamma-1)/2*M**2))))-4*f*L/D
+
+def _prat_from_mach(gamma,M):
+    return (((gamma+1)*M*M)/((gamma-1)*M*M+2))**(gamma/(gamma-1))*((gamma+1)/(2*gamma*M*M-(gamma-1)))**(1/(gamma-1))
+
+def _mach_fanno(L,f,D,gamma):
+    return bisect(_delta_fanno,0.001,0.99,args=(L,f,D,gamma))
+
+def _mach_from_G(Po,Rs,To,gamma,mdot,Apipe):
+    ###Kept with its original (gamma-2)/2 term, which costs the same to evaluate
+    def delta_G(M,Po,Rs,To,gamma,mdot,Apipe):
+        return mdot/Apipe - Po*np.sqrt(gamma/Rs/To)*M*(1+(gamma-2)/2*M*M)**(-(gamma+1)/(2*(gamma-1)))
+    return bisect(delta_G,0.00001,0.99,args=(Po,Rs,To,gamma,mdot,Apipe))
+
+def _mach_from_pressure_ratio(Po1,Po2,gamma):
+    Por  = Po2/Po1
+    def Prat(Mi,gamma,Por):
+        return (((gamma+1)*Mi*Mi)/((gamma-1)*Mi*Mi+2))**(gamma/(gamma-1))*((gamma+1)/(2*gamma*Mi*Mi-(gamma-1)))**(1/(gamma-1)) - Por
+    return bisect(Prat,1,100,args=(gamma,Por))
+
+baseline = {
+    'delta_mass_static': lambda: _delta_mass_static(0.3,0.5,5e5,287.05,300,1.4,1e-3),
+    'fanno_equation':    lambda: _fanno_equation(0.3,1.4),
+    'delta_fanno':       lambda: _delta_fanno(0.3,1.0,0.005,0.01,1.4),
+    'prat_from_mach':    lambda: _prat_from_mach(1.4,2.0),
+    'mach_fanno':        lambda: _mach_fanno(0.5,0.005,0.01,1.4),
+    'mach_from_G':       lambda: _mach_from_G(5e5,287.05,300,1.4,0.5,1e-3),
+    'mach_from_pressure_ratio': lambda: _mach_from_pressure_ratio(1e5,8e4,1.4),
+}
+
+cases = [
+    ('delta_mass_static', lambda g: delta_mass_static(0.3,0.5,5e5,_rs(g),300,g,1e-3)),
+    ('fanno_equation',    lambda g: fanno_equation(0.3,g)),
+    ('delta_fanno',       lambda g: delta_fanno(0.3,1.0,0.005,0.01,g)),
+    ('prat_from_mach',    lambda g: prat_from_mach(g,2.0)),
+    ('mach_fanno',        lambda g: mach_fanno(0.5,0.005,0.01,g)),
+    ('mach_from_G',       lambda g: mach_from_G(5e5,_rs(g),300,g,0.5,1e-3,'subsonic')),
+    ('mach_from_pressure_ratio', lambda g: mach_from_pressure_ratio(1e5,8e4,g)),
+]
+
+if __name__ == '__main__':
+    print('%-26s %14s %14s %14s %16s' % ('function', 'baseline (us)', 'float (us)', 'Gas (us)', 'baseline/Gas'))
+    for name, call in cases:
+        n = N if not name.startswith('mach') else N//20
+        t_float = min(timeit.repeat(lambda: call(1.4), number=n, repeat=5))/n*1e6
+        t_gas   = min(timeit.repeat(lambda: call(gas), number=n, repeat=5))/n*1e6
+        t_base  = min(timeit.repeat(baseline[name], number=n, repeat=5))/n*1e6
+        print('%-26s %14.2f %14.2f %14.2f %16.2f' % (name, t_base, t_float, t_gas, t_base/t_gas))
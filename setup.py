@@ -1,5 +1,11 @@
+import os
+import re
 from setuptools import setup
 
+#The version is defined once, in CompressibleFlowFunctions/__init__.py
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CompressibleFlowFunctions', '__init__.py')) as fh:
+    version = re.search(r"^__version__ = '([^']+)'", fh.read(), re.M).group(1)
+
 setups = ['setuptools']
 
 setup(
@@ -11,8 +17,12 @@ setup(
     # Needed for dependencies
     setup_requires=setups,
     install_requires=['numpy','scipy'],
+    extras_require={'parquet': ['pyarrow']},
+    # Command line tools
+    entry_points={'console_scripts': ['cff-batch=CompressibleFlowFunctions.batch:main',
+                                      'cff-serve=CompressibleFlowFunctions.service:main']},
     # *strongly* suggested for sharing
-    version='0.81',
+    version=version,
     # The license can be anything you like
     #license='MIT',
     description='A package containing various functions in compressible flow',
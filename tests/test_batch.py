@@ -0,0 +1,52 @@
+import csv
+import tracemalloc
+import numpy as np
+from CompressibleFlowFunctions.batch import *
+from CompressibleFlowFunctions.NSW import pstag_after_shock
+
+
+def _write_csv(path, header, rows):
+    with open(path, 'w', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def _read_csv(path):
+    with open(path, newline='') as fh:
+        return list(csv.DictReader(fh))
+
+def test_bad_cell_fails_only_its_row(tmp_path):
+    _write_csv(tmp_path/'in.csv', ['M', 'gamma', 'Po1'], [[2, 1.4, 100], ['', 1.4, 100], [3, 1.4, 100]])
+    nrows, nfailed = run_batch('NSW.pstag_after_shock', tmp_path/'in.csv', tmp_path/'out.csv', chunksize=2)
+    rows = _read_csv(tmp_path/'out.csv')
+    assert (nrows, nfailed) == (3, 1)
+    assert [row['status'] for row in rows] == ['ok', 'nonfinite', 'ok']
+    np.testing.assert_allclose(float(rows[0]['pstag_after_shock']), pstag_after_shock(2, 1.4, 100))
+
+def test_failing_first_chunk_without_returns_line(tmp_path):
+    header = ['Po2', 'To', 'gamma', 'M2', 'Rs', 'Dpipe', 'mu', 'epsilon', 'L', 'fluid']
+    good = [300, 300, 1.4, 0.5, 296.8, 0.5, 1.8e-5, 0.0015, 0.2, 'Nitrogen']
+    _write_csv(tmp_path/'in.csv', header, [good[:3] + ['x'] + good[4:], good])
+    nrows, nfailed = run_batch('algos.fanno_losses_backwards', tmp_path/'in.csv', tmp_path/'out.csv', chunksize=1)
+    rows = _read_csv(tmp_path/'out.csv')
+    assert (nrows, nfailed) == (2, 1)
+    assert [row['status'] for row in rows] == ['error', 'ok']
+    assert len([name for name in rows[0] if name.startswith('fanno_losses_backwards_')]) == 7
+
+def _peak_all_failing(tmp_path, n):
+    header = ['mdot', 'Rs', 'SG', 'Dpipe', 'Apipe', 'Po1', 'Po1_metric', 'To', 'gamma', 'mu', 'epsilon', 'L']
+    _write_csv(tmp_path/('in%d.csv' % n), header, [[1]*len(header)]*n)
+    tracemalloc.start()
+    try:
+        nrows, nfailed = run_batch('algos.fanno_losses', tmp_path/('in%d.csv' % n), tmp_path/('out%d.csv' % n), chunksize=500)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert nrows == nfailed == n
+    return peak
+
+def test_memory_bounded_when_every_chunk_fails(tmp_path):
+    #fanno_losses has no "Returns:" line and currently fails on every row
+    small = _peak_all_failing(tmp_path, 5000)
+    large = _peak_all_failing(tmp_path, 40000)
+    assert large < 1.5*small
@@ -0,0 +1,30 @@
+import pickle
+import numpy as np
+from CompressibleFlowFunctions.cache import *
+
+
+class _Exploit:
+    def __reduce__(self):
+        return (exec, ("raise AssertionError('pickle executed')",))
+
+def test_results_round_trip_without_pickle(tmp_path):
+    cache = ResultCache(str(tmp_path/'c.sqlite'))
+    value = (1.5, np.float64(2.5), np.array([1.0, 2.0]), 3)
+    cache.put('k', value)
+    hit, stored = cache.get('k')
+    assert hit
+    assert [type(v) for v in stored] == [type(v) for v in value]
+    np.testing.assert_array_equal(stored[2], value[2])
+    assert stored[0] == 1.5 and stored[1] == 2.5 and stored[3] == 3
+
+def test_pickled_entry_is_a_miss_and_never_loaded(tmp_path):
+    cache = ResultCache(str(tmp_path/'c.sqlite'))
+    cache.put('k', 1.0)
+    cache._connect().execute("UPDATE results SET value = ? WHERE key = 'k'", (pickle.dumps(_Exploit()),))
+    assert cache.get('k') == (False, None)
+
+def test_unstorable_result_is_returned_uncached(tmp_path):
+    cache = ResultCache(str(tmp_path/'c.sqlite'))
+    func = cache(lambda x: 'M=%g' % x)
+    assert func(2) == 'M=2'
+    assert cache.stats()['entries'] == 0
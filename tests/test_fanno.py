@@ -0,0 +1,44 @@
+import numpy as np
+from CompressibleFlowFunctions.Fanno import *
+
+
+f, D, gamma = 0.005, 0.01, 1.4
+
+def test_fanno_phi_max():
+    #4fL*/D as M tends to infinity: (1/gamma)*(-1) + (gamma+1)/(2gamma)*ln((gamma+1)/(gamma-1))
+    np.testing.assert_allclose(fanno_phi_max(gamma), -1/gamma + (gamma+1)/(2*gamma)*np.log((gamma+1)/(gamma-1)))
+    np.testing.assert_allclose(fanno_phi_max(gamma), 0.82151, rtol=1e-5)
+
+def test_mach_from_fanno_inverts_both_branches():
+    M = np.array([0.1, 0.5, 0.9, 1.2, 2.0, 5.0])
+    branch = np.where(M < 1, 'subsonic', 'supersonic')
+    for m, b in zip(M, branch):
+        np.testing.assert_allclose(mach_from_fanno(fanno_equation(m, gamma), gamma, b), m, rtol=1e-10)
+        np.testing.assert_allclose(mach_fanno(Lstar_fanno(f, D, m, gamma), f, D, gamma, b), m, rtol=1e-8)
+    assert np.isnan(mach_from_fanno(1.1*fanno_phi_max(gamma), gamma, 'supersonic'))
+
+def test_fanno_duct_regimes():
+    Lstar = Lstar_fanno(f, D, 3.0, gamma)
+    regime = fanno_duct([[3.0], [0.5]], np.array([0.5, 1.2, 3.0])*Lstar, f, D, gamma)[0]
+    names = np.array(FANNO_DUCT_REGIMES)[regime]
+    assert names[0].tolist() == ['supersonic', 'shock', 'shock_upstream']
+    assert names[1].tolist() == ['subsonic', 'subsonic', 'choked']
+
+def test_fanno_duct_shock_position():
+    M1 = np.array([2.0, 3.0, 4.0])
+    L  = 1.2*Lstar_fanno(f, D, M1, gamma)
+    regime, x_shock, Mx, My, M2, Po2_Po1 = fanno_duct(M1, L, f, D, gamma)
+    assert (regime == FANNO_DUCT_REGIMES.index('shock')).all()
+    #Supersonic Fanno line from M1 to Mx over x_shock, normal shock, subsonic line from My choking at the exit
+    np.testing.assert_allclose(Lstar_fanno(f, D, M1, gamma) - Lstar_fanno(f, D, Mx, gamma), x_shock, rtol=1e-8)
+    np.testing.assert_allclose(Lstar_fanno(f, D, My, gamma), L - x_shock, rtol=1e-8)
+    np.testing.assert_allclose(My, mach_after_shock(Mx, gamma), rtol=1e-12)
+    np.testing.assert_allclose(M2, 1)
+    #With a choked exit the mass flow fixes Po2*A*: the same ratio as a duct exactly L* long, whatever the shock loss
+    np.testing.assert_allclose(Po2_Po1, 1/fanno_po_ratio(M1, gamma), rtol=1e-8)
+
+def test_fanno_duct_without_shock():
+    regime, x_shock, Mx, My, M2, Po2_Po1 = fanno_duct(np.array([0.3, 2.5]), 0.1, f, D, gamma)
+    assert np.isnan(x_shock).all()
+    np.testing.assert_allclose(fanno_equation(M2, gamma), fanno_equation(np.array([0.3, 2.5]), gamma) - 4*f*0.1/D, rtol=1e-10)
+    np.testing.assert_allclose(Po2_Po1, fanno_po_ratio(M2, gamma)/fanno_po_ratio(np.array([0.3, 2.5]), gamma), rtol=1e-10)
@@ -0,0 +1,24 @@
+import numpy as np
+from CompressibleFlowFunctions.injector import *
+
+
+def test_lossless_manifold_feeds_every_hole_at_supply_pressure():
+    Po, Pc = np.array([2e5, 1.2e5, 1e6]), 1e5
+    Ahole = np.pi*2e-3**2/4
+    mdot, P, choked, mdot_total, converged = manifold_distribution(Po, Pc, 300, 287, 1.4, 2e-3, 0.8, 0.01, 0.01, nholes=20, fanning=0, K=0)
+    assert converged.all()
+    np.testing.assert_allclose(P, np.broadcast_to(Po[:,None], P.shape))
+    np.testing.assert_allclose(mdot_total, 20*orifice_mdot(Po, Pc, 300, 287, 1.4, 0.8, Ahole)[0], rtol=1e-12)
+
+def test_high_loss_manifold_never_falls_below_chamber_pressure():
+    #Most holes sit at the chamber pressure; the flow entering the manifold must still match the flow through the holes
+    Po, Pc, RT, Dmanifold, spacing, K = 2e5, 1e5, 287*300, 0.004, 0.01, 0.5
+    mdot, P, choked, mdot_total, converged = manifold_distribution(Po, Pc, 300, 287, 1.4, 2e-3, 0.8, Dmanifold, spacing, nholes=200, K=K)
+    assert converged[0]
+    assert (P >= Pc).all() and (P[0] == Pc).sum() > 100
+    np.testing.assert_array_equal(mdot[0][P[0] == Pc], 0)
+    kseg = (4*0.005*spacing/Dmanifold + K)/(2*(np.pi*Dmanifold**2/4)**2)
+    inflow = np.sqrt((Po - P[0,0])*P[0,0]/(kseg*RT))
+    np.testing.assert_allclose(mdot_total[0], inflow, rtol=1e-4)
+    mdot, P, choked, mdot_total, converged = manifold_distribution(Po, Pc, 300, 287, 1.4, 2e-3, 0.8, Dmanifold, spacing, nholes=200, K=K, tol=1e-10)
+    assert not converged[0] and np.isnan(P).all()
@@ -0,0 +1,17 @@
+import numpy as np
+from CompressibleFlowFunctions.Isentropic import *
+
+
+def test_mach_from_G_inverts_the_choked_mass_flow():
+    #mdot through Apipe at Mach M is the choked mass flow of the throat area Apipe/(A/A*)
+    Po, Rs, To, gamma, Apipe = 5e5, 287, 300, 1.4, 1e-3
+    for M, subsuper in ((0.1, 'subsonic'), (0.3157, 'subsonic'), (0.8, 'subsonic'), (1.5, 'supersonic'), (3.0, 'supersonic')):
+        mdot = mdot_from_throat_area(Apipe/aratio_from_mach(M, gamma), Po, Rs, To, gamma)
+        np.testing.assert_allclose(mach_from_G(Po, Rs, To, gamma, mdot, Apipe, subsuper), M, rtol=1e-9)
+
+def test_mach_from_G_agrees_with_mach_from_aratio():
+    Po, Rs, To, gamma, mdot, Apipe = 5e5, 287, 300, 1.4, 0.6, 1e-3
+    Astar = throat_area_from_mdot(mdot, Po, Rs, To, gamma)
+    for subsuper in ('subsonic', 'supersonic'):
+        np.testing.assert_allclose(mach_from_G(Po, Rs, To, gamma, mdot, Apipe, subsuper),
+                                   mach_from_aratio(Apipe, Astar, gamma, subsuper), rtol=1e-8)
@@ -0,0 +1,36 @@
+import numpy as np
+from CompressibleFlowFunctions.Riemann import *
+
+
+###Star states of the five test problems of Toro, Riemann Solvers and Numerical Methods for Fluid Dynamics, table 4.3
+
+TORO_TESTS = [
+    #rhoL, uL, pL, rhoR, uR, pR                                   p*        u*        rhoL*     rhoR*      rtol (tabulated digits)
+    ((1.0, 0.0, 1.0, 0.125, 0.0, 0.1),                           (0.30313, 0.92745, 0.42632, 0.26557), 1e-4),
+    ((1.0, -2.0, 0.4, 1.0, 2.0, 0.4),                            (0.00189, 0.00000, 0.02185, 0.02185), 3e-3),
+    ((1.0, 0.0, 1000.0, 1.0, 0.0, 0.01),                         (460.894, 19.5975, 0.57506, 5.99924), 1e-4),
+    ((1.0, 0.0, 0.01, 1.0, 0.0, 100.0),                          (46.0950, -6.19633, 5.99242, 0.57511), 1e-4),
+    ((5.99924, 19.5975, 460.894, 5.99242, -6.19633, 46.0950),    (1691.64, 8.68975, 14.2823, 31.0426), 1e-4),
+]
+
+def test_toro_star_states():
+    for states, expected, rtol in TORO_TESTS:
+        p, u, rhoL, rhoR, converged = riemann_star(*states, 1.4)
+        assert converged
+        np.testing.assert_allclose([p, u, rhoL, rhoR], expected, rtol=rtol, atol=1e-5)
+
+def test_toro_star_states_vectorized():
+    states = np.array([s for s, _, _ in TORO_TESTS]).T
+    p, u, rhoL, rhoR, converged = riemann_star(*states, 1.4)
+    assert converged.all()
+    np.testing.assert_allclose(np.array([p, u, rhoL, rhoR]).T, [e for _, e, _ in TORO_TESTS], rtol=3e-3, atol=1e-5)
+
+def test_sod_solution_far_field():
+    rho, u, p = riemann_solution(np.array([-1.0, 1.0]), 0.2, 1.0, 0.0, 1.0, 0.125, 0.0, 0.1, 1.4)
+    np.testing.assert_allclose(rho, [1.0, 0.125])
+    np.testing.assert_allclose(u, [0.0, 0.0])
+    np.testing.assert_allclose(p, [1.0, 0.1])
+
+def test_vacuum_generation_returns_nan():
+    p, u, rhoL, rhoR, converged = riemann_star(1.0, -20.0, 0.4, 1.0, 20.0, 0.4, 1.4)
+    assert np.isnan(p) and not converged
@@ -0,0 +1,53 @@
+import json
+import asyncio
+import threading
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from CompressibleFlowFunctions.service import *
+from CompressibleFlowFunctions.NSW import mach_after_shock
+
+
+@pytest.fixture
+def server():
+    #Runs the service on an ephemeral port in a background event loop
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    service = BatchingService(window=0.05, processes=False, workers=2)
+    srv = asyncio.run_coroutine_threadsafe(start_server(service, port=0), loop).result()
+    yield service, srv.sockets[0].getsockname()[1]
+    srv.close()
+    asyncio.run_coroutine_threadsafe(srv.wait_closed(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    service.close()
+
+def test_concurrent_calls_are_batched(server):
+    _, port = server
+    machs = np.linspace(1.1, 4, 16)
+    def call(M):
+        client = ServiceClient(port=port)
+        try:
+            return client.call('NSW.mach_after_shock', M1=float(M), gamma=1.4)
+        finally:
+            client.close()
+    with ThreadPoolExecutor(len(machs)) as pool:
+        results = list(pool.map(call, machs))
+    np.testing.assert_allclose(results, mach_after_shock(machs, 1.4))
+    client = ServiceClient(port=port)
+    metrics = client.metrics()
+    client.close()
+    assert metrics['requests'] == len(machs)
+    assert metrics['errors'] == 0
+    assert 1 <= metrics['batches'] < len(machs)
+
+def test_nonfinite_result_is_sent_as_null(server):
+    _, port = server
+    client = ServiceClient(port=port)
+    body = json.dumps({'function': 'NSW.mach_after_shock', 'args': {'M1': 0.1, 'gamma': 1.4}})
+    client.conn.request('POST', '/call', body, {'Content-Type': 'application/json'})
+    reply = json.loads(client.conn.getresponse().read(), parse_constant=lambda c: pytest.fail('Invalid JSON constant %s' % c))
+    client.close()
+    assert reply['status'] == 'nonfinite'
+    assert reply['result'] is None
@@ -0,0 +1,54 @@
+import numpy as np
+from CompressibleFlowFunctions.valve import *
+from CompressibleFlowFunctions.algos import valve_losses
+
+
+Cv, SG = 0.5, 1.0
+
+def test_p2_solves_flowrates():
+    P1 = np.array([50.0, 100.0, 300.0])
+    P2, choked = valve_p2(P1, Cv, SG, 500)
+    assert not choked.any()
+    np.testing.assert_allclose(flowrates(P2, P1, Cv, SG, 500), 0, atol=1e-8)
+
+def test_p1_p2_round_trip():
+    Q = np.linspace(1, 2200, 2001)
+    P2, choked = valve_p2(100, Cv, SG, Q)
+    P1, choked_back = valve_p1(P2[~choked], Cv, SG, Q[~choked])
+    assert not choked_back.any()
+    np.testing.assert_allclose(P1, 100, rtol=1e-12)
+
+def test_choked_at_flowrates_choked_capacity():
+    #Q between the choked capacity 42.2*0.87*Cv*P1/sqrt(SG) and the P2 = 0 limit of flowrates() is choked,
+    #but P2 is still the solution of flowrates(); past the P2 = 0 limit there is none
+    for Q in (2012.8, 42.2*0.87*Cv*100/np.sqrt(SG)):
+        P2, choked = valve_p2(100, Cv, SG, Q)
+        assert choked
+        np.testing.assert_allclose(flowrates(P2, 100, Cv, SG, Q), 0, atol=1e-8)
+    P2, choked = valve_p2(100, Cv, SG, 42.2*Cv*100/np.sqrt(SG)*1.01)
+    assert choked and np.isnan(P2)
+    P1, choked = valve_p1(10, Cv, SG, 2012.8)
+    assert choked
+    np.testing.assert_allclose(P1, flowrates_choked(Cv, SG, 2012.8))
+
+def test_valve_losses_keeps_flowrates_solution_below_half_p1():
+    #The root solves algos.valve_losses used before valve_forward, at P2 < P1/2
+    P1, Q, mdot, Rs, To, gamma, Apipe = 100, 1900, 0.1, 296.8, 300, 1.4, 1e-4
+    P2 = bisect(flowrates, 0, P1, args=(P1, Cv, SG, Q))
+    M  = bisect(delta_mass_static, 0.0001, 0.99, args=(mdot, P2*101325/14.7, Rs, To, gamma, Apipe))
+    Po = P2/(1+((gamma-1)/2)*M**2)**(-(gamma)/(gamma-1))
+    assert P2 < P1/2
+    np.testing.assert_allclose(valve_losses(P1, Cv, SG, Q, mdot, Rs, To, gamma, Apipe), (P2, M, Po), rtol=1e-9)
+    np.testing.assert_allclose(P2, 43.49, atol=5e-3)
+    assert valve_forward(P1, Cv, SG, Q, mdot, Rs, To, gamma, Apipe)[3]
+
+def test_forward_mach_solves_delta_mass_static():
+    P2, M2, Po2, choked = valve_forward(100, Cv, SG, 1000, 0.05, 296.8, 300, 1.4, 1e-4)
+    np.testing.assert_allclose(delta_mass_static(M2, 0.05, P2*101325/14.7, 296.8, 300, 1.4, 1e-4), 0, atol=1e-12)
+
+def test_iec_p2_round_trip():
+    P2 = np.linspace(60, 99, 40)
+    Q, Y, choked = iec_valve_flow(100, P2, Cv, SG, 300, 1.4)
+    assert not choked.any()
+    P2_back, choked = iec_valve_p2(100, Cv, SG, 300, 1.4, Q)
+    np.testing.assert_allclose(P2_back, P2, rtol=1e-10)